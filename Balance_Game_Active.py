@@ -1,10 +1,12 @@
 import pygame
 import math
 import random
+from Game_Events import EVENTS
 
 class EmotionGameCore:
-    def __init__(self, hole_enabled=True, headless=False, enabled=False, num_holes=8):
+    def __init__(self, hole_enabled=True, headless=False, enabled=False, num_holes=8, events=EVENTS):
         pygame.init()
+        self.events = events  # 게임 이벤트 링 버퍼 (콘솔 출력 대신 구조화된 레코드로 기록)
         self.WIDTH, self.HEIGHT = 1200, 1000
         self.hole_enabled = hole_enabled
         self.headless = headless
@@ -54,6 +56,7 @@ class EmotionGameCore:
         self.ball_vx = 0
         self.game_over = False
         self.success = False
+        self.current_steps = 0
 
         # 구멍 랜덤 생성
         self.holes = [
@@ -80,13 +83,15 @@ class EmotionGameCore:
 
     def update(self):
         self.frame_count += 1
+        self.current_steps += 1
 
         # 바람 갱신 (주기적으로)
         if self.wind_enabled and self.frame_count % self.wind_update_interval == 0:
             self.wind_strength = random.uniform(0.02, 0.1)
             self.wind_direction = random.choice([-1, 1])
             self.wind_variation = random.uniform(0.005, 0.02)
-            print(f"🌬️ 바람 갱신 - 방향: {'→' if self.wind_direction > 0 else '←'}, 세기: {self.wind_strength:.3f}")
+            self.events.emit("wind", self.frame_count, self.current_steps, strength=self.wind_strength,
+                             direction=self.wind_direction, variation=self.wind_variation)
 
         # 바람 영향 계산
         wind_force = 0.0
@@ -118,11 +123,14 @@ class EmotionGameCore:
         # 게임 판정
         if self.ball_x < bar_x0 or self.ball_x > bar_x0 + self.bar_width:
             self.game_over = True
+            self.events.emit("fall_off", self.frame_count, self.current_steps, x=self.ball_x)
         elif self.is_in_hole(self.ball_x, self.ball_y):
             self.game_over = True
+            self.events.emit("hole", self.frame_count, self.current_steps, x=self.ball_x, y=self.ball_y)
         elif self.is_in_goal(self.ball_x, self.ball_y):
             self.success = True
             self.game_over = True
+            self.events.emit("success", self.frame_count, self.current_steps)
 
     def is_in_hole(self, x, y):
         return any(math.hypot(x - hx, y - hy) < self.ball_radius for hx, hy in self.holes)
@@ -0,0 +1,238 @@
+import time
+
+import numpy as np
+import pygame
+
+SIM_FPS = 60  # 1배속 시뮬레이션 속도 (스텝/초)
+EVENT_INTERVAL = 0.02  # 그리지 않는 스텝에서도 이 간격(초)마다 이벤트 처리
+
+
+class EmotionGameRenderer:
+    """Balance_Game_Tuned.EmotionGameCore 의 pygame 렌더러 (render() 첫 호출 때 생성)
+
+    배경(바탕/목표/구멍)은 구멍 배치가 바뀔 때만 캐시 서피스에 미리 그려 두고,
+    매 프레임은 지난 프레임에 그린 영역만 배경으로 지운 뒤 막대/공/바람/점수를 그린다.
+    글자는 값이 바뀔 때만 다시 래스터화하고, 화면에는 바뀐 영역만 올린다.
+
+    화면 모드에서 시뮬레이션 속도와 화면 갱신 속도는 따로 간다 (frame() 참고).
+    speed 배속으로 스텝을 진행하되 화면은 최대 render_fps 로만 그리고,
+    turbo 면 속도 제한 없이 진행하면서 render_every 스텝마다 (0 이면 render_fps 로) 그린다.
+    키: SPACE 터보 전환, ↑/↓ 배속 2배/절반, ESC 종료
+    """
+
+    def __init__(self, game, speed=1.0, turbo=False, render_every=0, render_fps=60):
+        self.game = game
+
+        if not game.headless and game.enabled:
+            pygame.init()
+            self.screen = pygame.display.set_mode((game.WIDTH, game.HEIGHT))
+            self.pixels = None
+        else:
+            # 오프스크린: 디스플레이 없이 NumPy 버퍼를 픽셀 메모리로 쓰는 서피스 (rgb_array 가 복사 없이 봄)
+            pygame.font.init()
+            self.pixels = np.zeros((game.HEIGHT, game.WIDTH, 4), dtype=np.uint8)
+            self.screen = pygame.image.frombuffer(self.pixels, (game.WIDTH, game.HEIGHT), "RGBX")
+        self._small = {}  # 축소 프레임 크기 -> (버퍼, 서피스)
+
+        self.clock = pygame.time.Clock()
+
+        # 재생 속도 설정
+        self.speed = speed
+        self.turbo = turbo
+        self.render_every = render_every
+        self.render_fps = render_fps
+        self._steps = 0
+        self._last_present = 0.0
+        self._last_events = 0.0
+        self._update_caption()
+
+        # 폰트 초기화 (매 프레임 생성 방지)
+        self.font = pygame.font.SysFont(None, 24)
+
+        # 목표 영역
+        self.goal_rect = pygame.Rect(game.goal_left, game.goal_top, game.goal_width, game.goal_height)
+
+        # 정적 레이어: background = 바탕 + 목표 + 구멍, hole_layer = 구멍만 (공/막대 위에 다시 덮음)
+        self.background = pygame.Surface((game.WIDTH, game.HEIGHT), 0, self.screen)  # screen 과 같은 픽셀 형식
+        # 알파 레이어도 RGB 채널 순서를 screen 에 맞춰야 빠른 블릿 경로를 탐 (RGBX 화면에서 ~15배 차이)
+        r, g, b, _ = self.screen.get_masks()
+        self.hole_layer = pygame.Surface((game.WIDTH, game.HEIGHT), pygame.SRCALPHA, 32,
+                                         masks=(r, g, b, 0xFFFFFFFF ^ (r | g | b)))
+        self._holes = None  # 정적 레이어를 그린 구멍 목록 (reset 때마다 새 리스트)
+        self._dirty = []  # 지난 프레임에 동적 요소를 그린 영역
+
+        # 글자 캐시 (값이 같으면 다시 그리지 않음)
+        self._wind_label = None
+        self._wind_text = None
+        self._scores = None
+        self._score_texts = []
+
+    def _build_static(self):
+        game = self.game
+        self.background.fill((30, 30, 30))
+
+        # 목표 지점
+        pygame.draw.rect(self.background, (255, 255, 255),
+                         self.goal_rect, border_radius=8)
+
+        # 구멍
+        self.hole_layer.fill((0, 0, 0, 0))
+        for hx, hy in game.holes:
+            for surface in (self.background, self.hole_layer):
+                pygame.draw.circle(surface, (80, 0, 0),
+                                   (hx, hy), game.ball_radius - 2)
+                pygame.draw.circle(surface, (255, 50, 50),
+                                   (hx, hy), game.ball_radius, 2)
+
+        self._holes = game.holes
+        self.screen.blit(self.background, (0, 0))
+        self._dirty = []
+
+    def _score_surfaces(self):
+        game = self.game
+        scores = tuple(game.best_scores)
+        if scores != self._scores:
+            self._scores = scores
+            self._score_texts = []
+            if scores:
+                self._score_texts.append((self.font.render("Best 10 Success Time", True, (150, 200, 255)),
+                                          (game.WIDTH - 270, 10)))
+            for i, score in enumerate(scores):
+                self._score_texts.append((self.font.render(f"{i + 1}. {score} steps", True, (180, 180, 180)),
+                                          (game.WIDTH - 250, 30 + 18 * i)))
+        return self._score_texts
+
+    def _update_caption(self):
+        if self.game.enabled and not self.game.headless:
+            mode = "turbo" if self.turbo else f"x{self.speed:g}"
+            pygame.display.set_caption(f"Emotion Game (RL Core) - {mode}")
+
+    def handle_events(self):
+        """창 닫기/재생 속도 키 처리"""
+        self._last_events = time.perf_counter()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                pygame.quit()
+                exit()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    self.turbo = not self.turbo
+                elif event.key == pygame.K_UP:
+                    self.speed = min(self.speed * 2, 64)
+                elif event.key == pygame.K_DOWN:
+                    self.speed = max(self.speed / 2, 1 / 8)
+                else:
+                    continue
+                self._update_caption()
+
+    def frame(self):
+        """시뮬레이션 1스텝마다 호출: 필요할 때만 그리고, 배속에 맞춰 대기"""
+        if not self.game.enabled:
+            self.draw()  # 화면 없는 오프스크린 렌더링은 매번 그림
+            return
+
+        self._steps += 1
+        now = time.perf_counter()
+        if self.turbo:
+            due = (self._steps % self.render_every == 0 if self.render_every
+                   else now - self._last_present >= 1 / self.render_fps)
+        else:
+            due = now - self._last_present >= 1 / self.render_fps or self.speed <= self.render_fps / SIM_FPS
+
+        if due:
+            self.handle_events()
+            self.draw()
+            self._last_present = time.perf_counter()
+        elif now - self._last_events >= EVENT_INTERVAL:
+            self.handle_events()  # 그리지 않아도 창이 응답하도록
+
+        if not self.turbo:
+            self.clock.tick(SIM_FPS * self.speed)
+
+    def rgb_array(self, size=None):
+        """마지막으로 그린 프레임 (높이, 너비, 3) uint8
+
+        오프스크린이면 서피스 픽셀 메모리의 view 를 그대로 돌려주므로 복사가 없고,
+        다음 그리기에서 덮어써진다. size=(너비, 높이) 를 주면 미리 만든 버퍼에 축소해 그 view 를 돌려준다.
+        화면 모드에서는 디스플레이 서피스를 복사한다.
+        """
+        if self.pixels is None:
+            surface = self.screen if size is None else pygame.transform.smoothscale(self.screen, size)
+            return pygame.surfarray.array3d(surface).transpose(1, 0, 2)
+        if size is None:
+            return self.pixels[:, :, :3]
+        if size not in self._small:
+            buffer = np.zeros((size[1], size[0], 4), dtype=np.uint8)
+            self._small[size] = (buffer, pygame.image.frombuffer(buffer, size, "RGBX"))
+        buffer, surface = self._small[size]
+        pygame.transform.smoothscale(self.screen, size, surface)
+        return buffer[:, :, :3]
+
+    def draw(self):
+        """현재 상태를 screen 에 그리고 (화면 모드면) 바뀐 영역을 표시"""
+        game = self.game
+
+        # 구멍 배치가 바뀌면 정적 레이어를 다시 만들고 화면 전체를 갱신, 아니면 지난 영역만 지움
+        full = game.holes is not self._holes
+        if full:
+            self._build_static()
+        else:
+            for rect in self._dirty:
+                self.screen.blit(self.background, rect, rect)
+        screen = self.screen
+        rects = []
+
+        # 막대
+        rects.append(pygame.draw.line(screen, (80, 50, 20),
+                                      (game.bar_center_x - game.bar_width // 2, game.bar_left_y),
+                                      (game.bar_center_x + game.bar_width // 2, game.bar_right_y),
+                                      game.bar_thickness))
+
+        # 공
+        rects.append(pygame.draw.circle(screen, (200, 200, 255),
+                                        (int(game.ball_x), int(game.ball_y)), game.ball_radius))
+
+        # 구멍은 막대/공 위에 그려지도록 그 영역만 다시 덮음
+        for rect in rects:
+            screen.blit(self.hole_layer, rect, rect)
+
+        # 바람 시각화
+        if game.wind_enabled:
+            wind_display_x = game.WIDTH // 2
+            wind_display_y = 30
+            arrow_length = int(game.wind_strength * 500)
+            arrow_dx = arrow_length * game.wind_direction
+
+            rects.append(pygame.draw.line(screen, (200, 200, 0),
+                                          (wind_display_x, wind_display_y),
+                                          (wind_display_x + arrow_dx, wind_display_y), 4))
+
+            if game.wind_direction > 0:
+                rects.append(pygame.draw.polygon(screen, (200, 200, 0), [
+                    (wind_display_x + arrow_dx, wind_display_y),
+                    (wind_display_x + arrow_dx - 10, wind_display_y - 5),
+                    (wind_display_x + arrow_dx - 10, wind_display_y + 5),
+                ]))
+            else:
+                rects.append(pygame.draw.polygon(screen, (200, 200, 0), [
+                    (wind_display_x + arrow_dx, wind_display_y),
+                    (wind_display_x + arrow_dx + 10, wind_display_y - 5),
+                    (wind_display_x + arrow_dx + 10, wind_display_y + 5),
+                ]))
+
+            label = f"Wind: {game.wind_strength * game.wind_direction:+.2f}"
+            if label != self._wind_label:
+                self._wind_label = label
+                self._wind_text = self.font.render(label, True, (255, 255, 255))
+            rects.append(screen.blit(self._wind_text, (wind_display_x - 60, wind_display_y - 20)))
+
+        # ---- Best 10 Score 표시 ----
+        for text, pos in self._score_surfaces():
+            rects.append(screen.blit(text, pos))
+
+        if game.enabled:
+            if full:
+                pygame.display.flip()
+            else:
+                pygame.display.update(self._dirty + rects)
+        self._dirty = rects
@@ -1,10 +1,16 @@
-import pygame
-import math
-import random
+import numpy as np
+from Profiler import PROFILER
+from Game_Events import EVENTS
+from Game_Random import make_rng, NOISE_BLOCK, RNG_STATE_DTYPE, pack_rng_state, unpack_rng_state
+from Game_State import state_dtype
+from Game_Jit import USE_JIT, update_kernel, hole_kernel, RUNNING, FALL_OFF, IN_HOLE, IN_GOAL
+from Hole_Index import HoleIndex, hole_cell_size
+from Hole_Layout import generate_layouts
 
 class EmotionGameCore:
-    def __init__(self, hole_enabled=True, headless=False, enabled=False, num_holes=8):
-        pygame.init()
+    def __init__(self, hole_enabled=True, headless=False, enabled=False, num_holes=8, events=EVENTS, seed=None,
+                 use_jit=None, hole_margin=20, level_bank=None):
+        self.events = events  # 게임 이벤트 링 버퍼 (콘솔 출력 대신 구조화된 레코드로 기록)
         self.best_scores = []  # 성공시 걸린 step(프레임) top 10
         self.current_steps = 0  # 에피소드별 스텝 카운터
 
@@ -12,7 +18,16 @@ class EmotionGameCore:
         self.hole_enabled = hole_enabled
         self.headless = headless
         self.enabled = enabled
-        self.num_holes = num_holes
+        self.level_bank = level_bank  # Level_Bank.LevelBank: 있으면 reset 때 미리 만든 레벨에서 뽑음
+        self.num_holes = num_holes if level_bank is None else level_bank.max_holes
+        self.hole_margin = hole_margin  # 구멍끼리 최소 간격 = 공 지름 + hole_margin
+        self.use_jit = USE_JIT if use_jit is None else use_jit  # Numba 커널 사용 여부 (기본: 설치돼 있으면 사용)
+
+        # 인스턴스 전용 난수 생성기 (구멍 배치/공 위치/바람 모두 여기서 뽑음)
+        self.rng = make_rng(seed)
+        self._noise = []  # 바람 잡음용 [0, 1) 균등난수 블록
+        self._noise_pos = 0
+        self._noise_rng = np.zeros((), RNG_STATE_DTYPE)  # 잡음 블록을 뽑기 직전의 난수 상태 (스냅샷용)
 
         # 바람 설정
         self.wind_enabled = True  # 바람 활성화 여부
@@ -21,17 +36,13 @@ class EmotionGameCore:
         self.wind_update_interval = 100
         self.wind_variation = 0.02
         self.frame_count = 0
+        self.level = -1  # 현재 레벨 뱅크 번호 (-1: 난수 생성)
+        self._wind_schedule = []  # 레벨의 바람 일정 [(세기, 방향, 변동), ...]
+        self._wind_idx = 0
 
-        if not self.headless and self.enabled:
-            self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
-            pygame.display.set_caption("Emotion Game (RL Core)")
-        else:
-            self.screen = pygame.Surface((self.WIDTH, self.HEIGHT))
-
-        self.clock = pygame.time.Clock()
-
-        # 폰트 초기화 (매 프레임 생성 방지)
-        self.font = pygame.font.SysFont(None, 24)
+        # 화면/폰트/클럭은 render() 첫 호출 때 렌더러가 생성 (headless 에서는 pygame 불필요)
+        self.renderer = None
+        self.render_options = {}  # 렌더러 생성 인자 (speed, turbo, render_every, render_fps)
 
         # 막대 설정
         self.bar_center_x = self.WIDTH // 2
@@ -44,32 +55,61 @@ class EmotionGameCore:
         self.ball_radius = 18
         self.gravity = 0.3
         self.friction = 0.995
+        self.hole_cell_size = hole_cell_size(self.ball_radius)  # 구멍 격자 칸 크기
 
-        # 목표 영역
-        self.goal_rect = pygame.Rect(self.WIDTH // 2 - 125, 40, 250, 80)
+        # 구멍 배치 영역 (x0, y0, x1, y1): 막대 폭 안, 목표 아래 ~ 공 시작 높이 위
+        bar_x0 = self.bar_center_x - self.bar_width // 2
+        self.hole_region = (bar_x0, 200, bar_x0 + self.bar_width, self.HEIGHT - 200)
+
+        # 목표 영역 (pygame.Rect 대신 숫자로 보관)
+        self.goal_left, self.goal_top = self.WIDTH // 2 - 125, 40
+        self.goal_width, self.goal_height = 250, 80
+        self.goal_right = self.goal_left + self.goal_width
+        self.goal_bottom = self.goal_top + self.goal_height
+        self.goal_centerx = self.goal_left + self.goal_width // 2
+
+        # JIT 커널에 넘기는 상수 (Game_Jit.P_* 순서)
+        self.jit_params = np.array([
+            self.bar_center_x, self.bar_width, self.ball_radius, self.gravity, self.friction,
+            self.goal_left, self.goal_right, self.goal_top, self.goal_bottom, self.HEIGHT, self.goal_centerx,
+            self.hole_cell_size, self.WIDTH // self.hole_cell_size + 1, self.HEIGHT // self.hole_cell_size + 1
+        ], dtype=np.float64)
         self.reset()
 
-    def reset(self):
+    def reset(self, seed=None, level=None):
+        """level 을 주면 레벨 뱅크의 그 레벨로, 뱅크만 있으면 뱅크에서 뽑은 레벨로 시작"""
+        if seed is not None:
+            self.rng = make_rng(seed)
+            self._noise_pos = len(self._noise)  # 이전 시드로 뽑아 둔 잡음은 버림
+
         self.bar_left_y = self.HEIGHT - 100
         self.bar_right_y = self.HEIGHT - 100
-        self.ball_x = self.bar_center_x + random.uniform(-10, 10)
+        self.ball_x = self.bar_center_x + self.rng.uniform(-10, 10)
         self.ball_y = self.bar_left_y - self.ball_radius - 5
         self.ball_vx = 0
         self.game_over = False
         self.success = False
         self.current_steps = 0
 
-        # 구멍 랜덤 생성
-        self.holes = [
-            (600 + random.randint(0, 100), 200),
-            (500 + random.randint(0, 100), 450),
-            (350 + random.randint(0, 100), 600),
-            (300 + random.randint(0, 100), 480),
-            (730 + random.randint(0, 100), 550),
-            (650 + random.randint(0, 100), 700),
-            (500 + random.randint(0, 100), 800),
-            (400 + random.randint(0, 100), 350)
-        ] if self.hole_enabled else []
+        if self.level_bank is not None:
+            self._load_level(int(self.level_bank.sample(self.rng)) if level is None else int(level))
+        else:
+            # 구멍 랜덤 생성 (8개면 기존 배치, 그 외 개수는 격자 지터 배치)
+            self.holes = [tuple(h) for h in generate_layouts(
+                self.rng, 1, self.num_holes, region=self.hole_region,
+                ball_radius=self.ball_radius, margin=self.hole_margin)[0].tolist()] if self.hole_enabled else []
+        self.hole_index = HoleIndex(self.holes, cell_size=self.hole_cell_size,  # 충돌/거리 조회용 격자
+                                    width=self.WIDTH, height=self.HEIGHT)
+
+    def _load_level(self, level, wind_idx=0):
+        """레벨 뱅크(memmap) 에서 레벨 하나의 구멍/바람 일정을 읽어 옴"""
+        rec = self.level_bank.levels[level]
+        self.level = level
+        self.holes = [tuple(h) for h in rec["holes"][:rec["hole_count"]].tolist()] if self.hole_enabled else []
+        n = int(rec["wind_count"])
+        self._wind_schedule = list(zip(rec["wind_strength"][:n].tolist(), rec["wind_direction"][:n].tolist(),
+                                       rec["wind_variation"][:n].tolist()))
+        self._wind_idx = wind_idx
 
     def apply_action(self, action):
         speed = 4
@@ -87,19 +127,74 @@ class EmotionGameCore:
         self.frame_count += 1
         self.current_steps += 1  # 한 번씩 증가
 
+        profiling = PROFILER.enabled
+        if profiling:
+            PROFILER.start("wind")
+
         # 바람 갱신 (주기적으로)
         if self.wind_enabled and self.frame_count % self.wind_update_interval == 0:
-            self.wind_strength = random.uniform(0.02, 0.07)
-            self.wind_direction = random.choice([-1, 1])
-            self.wind_variation = random.uniform(0.005, 0.02)
-            print(f"🌬️ 바람 갱신 - 방향: {'→' if self.wind_direction > 0 else '←'}, 세기: {self.wind_strength:.3f}")
+            if self._wind_idx < len(self._wind_schedule):
+                # 레벨 바람 일정을 다 쓸 때까지는 일정대로
+                self.wind_strength, self.wind_direction, self.wind_variation = self._wind_schedule[self._wind_idx]
+                self._wind_idx += 1
+            else:
+                self.wind_strength = self.rng.uniform(0.02, 0.07)
+                self.wind_direction = 1 if self.rng.random() < 0.5 else -1
+                self.wind_variation = self.rng.uniform(0.005, 0.02)
+            self.events.emit("wind", self.frame_count, self.current_steps, strength=self.wind_strength,
+                             direction=self.wind_direction, variation=self.wind_variation)
 
         # 바람 영향 계산
         wind_force = 0.0
         if self.wind_enabled:
             wind_force = self.wind_strength * self.wind_direction
-            wind_force += random.uniform(-self.wind_variation, self.wind_variation)
+            if self._noise_pos == len(self._noise):
+                pack_rng_state(self.rng, self._noise_rng)
+                self._noise = self.rng.random(NOISE_BLOCK).tolist()
+                self._noise_pos = 0
+            u = self._noise[self._noise_pos]
+            self._noise_pos += 1
+            wind_force += self.wind_variation * (2.0 * u - 1.0)
+
+        if profiling:
+            PROFILER.stop()
+            PROFILER.start("physics")
+
+        if self.use_jit:
+            (self.ball_x, self.ball_y, self.ball_vx, self.bar_left_y, self.bar_right_y,
+             status) = update_kernel(self.ball_x, self.ball_vx, self.bar_left_y, self.bar_right_y,
+                                     wind_force, self.hole_index.holes, self.hole_index.cell_start,
+                                     self.jit_params)
+        else:
+            status = self._update_physics(wind_force)
+
+        # 게임 판정
+        if status == FALL_OFF:
+            self.game_over = True
+            self.events.emit("fall_off", self.frame_count, self.current_steps, x=self.ball_x)
+        elif status == IN_HOLE:
+            self.game_over = True
+            self.events.emit("hole", self.frame_count, self.current_steps, x=self.ball_x, y=self.ball_y)
+        elif status == IN_GOAL:
+            self.success = True
+            self.game_over = True
+
+        if self.is_in_goal(self.ball_x, self.ball_y):
+            self.success = True
+            self.game_over = True
+            self.events.emit("success", self.frame_count, self.current_steps)
+            # Best 10 스코어 갱신
+            self.best_scores.append(self.current_steps)
+            self.best_scores = sorted(self.best_scores)[:10]  # 최소 10개만 유지
+            if self.current_steps in self.best_scores:
+                self.events.emit("best_score", self.frame_count, self.current_steps,
+                                 rank=self.best_scores.index(self.current_steps) + 1)
 
+        if profiling:
+            PROFILER.stop()
+
+    def _update_physics(self, wind_force):
+        """공/막대 물리 진행 후 판정 결과 코드 반환 (Game_Jit.update_kernel 의 파이썬 버전)"""
         # 공의 움직임
         slope = (self.bar_right_y - self.bar_left_y) / self.bar_width
         ball_ax = slope * self.gravity
@@ -117,102 +212,91 @@ class EmotionGameCore:
         self.bar_right_y += gravity_strength
 
         max_y = self.HEIGHT
-        min_y = self.goal_rect.bottom
+        min_y = self.goal_bottom
         self.bar_left_y = max(min_y, min(self.bar_left_y, max_y))
         self.bar_right_y = max(min_y, min(self.bar_right_y, max_y))
 
-        # 게임 판정
         if self.ball_x < bar_x0 or self.ball_x > bar_x0 + self.bar_width:
-            self.game_over = True
-        elif self.is_in_hole(self.ball_x, self.ball_y):
-            self.game_over = True
-        elif self.is_in_goal(self.ball_x, self.ball_y):
-            self.success = True
-            self.game_over = True
-
+            return FALL_OFF
+        if self.is_in_hole(self.ball_x, self.ball_y):
+            return IN_HOLE
         if self.is_in_goal(self.ball_x, self.ball_y):
-            self.success = True
-            self.game_over = True
-            # Best 10 스코어 갱신
-            self.best_scores.append(self.current_steps)
-            self.best_scores = sorted(self.best_scores)[:10]  # 최소 10개만 유지
+            return IN_GOAL
+        return RUNNING
+
+    def snapshot(self, out=None):
+        """현재 상태 전체를 고정 크기 레코드(Game_State.state_dtype)로 저장
+
+        out 에 레코드(예: 미리 만든 배열의 한 칸)를 주면 그 자리에 기록한다.
+        """
+        rec = np.zeros((), state_dtype(self.num_holes)) if out is None else out
+        rec["ball_x"] = self.ball_x
+        rec["ball_y"] = self.ball_y
+        rec["ball_vx"] = self.ball_vx
+        rec["bar_left_y"] = self.bar_left_y
+        rec["bar_right_y"] = self.bar_right_y
+        rec["wind_strength"] = self.wind_strength
+        rec["wind_direction"] = self.wind_direction
+        rec["wind_variation"] = self.wind_variation
+        rec["frame_count"] = self.frame_count
+        rec["current_steps"] = self.current_steps
+        rec["game_over"] = self.game_over
+        rec["success"] = self.success
+        rec["hole_count"] = len(self.holes)
+        if self.holes:
+            rec["holes"][:len(self.holes)] = self.holes
+        rec["level"] = self.level
+        rec["wind_idx"] = self._wind_idx
+        pack_rng_state(self.rng, rec["rng"])
+        rec["noise_rng"] = self._noise_rng
+        rec["noise_len"] = len(self._noise)
+        rec["noise_pos"] = self._noise_pos
+        return rec
+
+    def restore(self, rec):
+        """snapshot() 레코드로 상태 복원 (이후 진행은 저장 시점과 동일)"""
+        self.ball_x = float(rec["ball_x"])
+        self.ball_y = float(rec["ball_y"])
+        self.ball_vx = float(rec["ball_vx"])
+        self.bar_left_y = float(rec["bar_left_y"])
+        self.bar_right_y = float(rec["bar_right_y"])
+        self.wind_strength = float(rec["wind_strength"])
+        self.wind_direction = int(rec["wind_direction"])
+        self.wind_variation = float(rec["wind_variation"])
+        self.frame_count = int(rec["frame_count"])
+        self.current_steps = int(rec["current_steps"])
+        self.game_over = bool(rec["game_over"])
+        self.success = bool(rec["success"])
+        self.holes = [tuple(h) for h in rec["holes"][:int(rec["hole_count"])].tolist()]
+        self.hole_index = HoleIndex(self.holes, cell_size=self.hole_cell_size, width=self.WIDTH, height=self.HEIGHT)
+        self.level = int(rec["level"])
+        if self.level >= 0 and self.level_bank is not None:
+            self._load_level(self.level, int(rec["wind_idx"]))
+        else:
+            self._wind_schedule = []
+            self._wind_idx = 0
+        unpack_rng_state(rec["rng"], self.rng)
+
+        # 잡음 블록은 뽑기 직전 상태에서 다시 뽑아 같은 값을 얻음
+        noise_len = int(rec["noise_len"])
+        self._noise_rng[...] = rec["noise_rng"]
+        self._noise = unpack_rng_state(rec["noise_rng"]).random(noise_len).tolist() if noise_len else []
+        self._noise_pos = int(rec["noise_pos"]) if noise_len else 0
 
     def is_in_hole(self, x, y):
-        return any(math.hypot(x - hx, y - hy) < self.ball_radius for hx, hy in self.holes)
+        if self.use_jit:
+            return hole_kernel(x, y, self.hole_index.holes, self.hole_index.cell_start, self.jit_params)
+        return self.hole_index.any_within(x, y, self.ball_radius)
 
     def is_in_goal(self, x, y):
-        return self.goal_rect.collidepoint(x, y)
+        return self.goal_left <= x < self.goal_right and self.goal_top <= y < self.goal_bottom
 
     def render(self):
         if self.headless:
             return
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-
-        self.screen.fill((30, 30, 30))
-
-        # 목표 지점
-        pygame.draw.rect(self.screen, (255, 255, 255),
-                         self.goal_rect, border_radius=8)
-
-        # 막대
-        pygame.draw.line(self.screen, (80, 50, 20),
-                         (self.bar_center_x - self.bar_width // 2, self.bar_left_y),
-                         (self.bar_center_x + self.bar_width // 2, self.bar_right_y),
-                         self.bar_thickness)
-
-        # 공
-        pygame.draw.circle(self.screen, (200, 200, 255),
-                           (int(self.ball_x), int(self.ball_y)), self.ball_radius)
-
-        # 구멍
-        for hx, hy in self.holes:
-            pygame.draw.circle(self.screen, (80, 0, 0),
-                               (hx, hy), self.ball_radius - 2)
-            pygame.draw.circle(self.screen, (255, 50, 50),
-                               (hx, hy), self.ball_radius, 2)
-
-        # 바람 시각화
-        if self.wind_enabled:
-            wind_display_x = self.WIDTH // 2
-            wind_display_y = 30
-            arrow_length = int(self.wind_strength * 500)
-            arrow_dx = arrow_length * self.wind_direction
-
-            pygame.draw.line(self.screen, (200, 200, 0),
-                             (wind_display_x, wind_display_y),
-                             (wind_display_x + arrow_dx, wind_display_y), 4)
-
-            if self.wind_direction > 0:
-                pygame.draw.polygon(self.screen, (200, 200, 0), [
-                    (wind_display_x + arrow_dx, wind_display_y),
-                    (wind_display_x + arrow_dx - 10, wind_display_y - 5),
-                    (wind_display_x + arrow_dx - 10, wind_display_y + 5),
-                ])
-            else:
-                pygame.draw.polygon(self.screen, (200, 200, 0), [
-                    (wind_display_x + arrow_dx, wind_display_y),
-                    (wind_display_x + arrow_dx + 10, wind_display_y - 5),
-                    (wind_display_x + arrow_dx + 10, wind_display_y + 5),
-                ])
-
-            wind_text = self.font.render(f"Wind: {self.wind_strength * self.wind_direction:+.2f}", True, (255, 255, 255))
-            self.screen.blit(wind_text, (wind_display_x - 60, wind_display_y - 20))
-
-        # ---- Best 10 Score 표시 ----
-        if self.best_scores:
-            score_text = "Best 10 Success Time"
-            text = self.font.render(score_text, True, (150, 200, 255))
-            self.screen.blit(text, (self.WIDTH - 270, 10))
-
-            for i, score in enumerate(self.best_scores):
-                score_str = f"{i + 1}. {score} steps"
-                s = self.font.render(score_str, True, (180, 180, 180))
-                self.screen.blit(s, (self.WIDTH - 250, 30 + 18 * i))
-
-        if self.enabled:
-            pygame.display.flip()
-            self.clock.tick(60)
+        # pygame 렌더러는 실제로 render() 를 호출할 때 처음 불러옴
+        if self.renderer is None:
+            from Balance_Game_Render import EmotionGameRenderer
+            self.renderer = EmotionGameRenderer(self, **self.render_options)
+        self.renderer.frame()
@@ -0,0 +1,348 @@
+import numpy as np
+from Game_Random import make_rng, NOISE_BLOCK, RNG_STATE_DTYPE, pack_rng_state, unpack_rng_state
+from Game_State import state_dtype
+from Hole_Index import BatchHoleIndex, INDEX_MIN_HOLES, hole_cell_size
+from Hole_Layout import generate_layouts
+from Profiler import PROFILER
+from Reward_Tuned import hypot
+
+# 액션별 막대 이동량 (0: 왼쪽↑, 1: 왼쪽↓, 2: 오른쪽↑, 3: 오른쪽↓, 4: 유지)
+ACTION_LEFT_DY = np.array([-4.0, 4.0, 0.0, 0.0, 0.0])
+ACTION_RIGHT_DY = np.array([0.0, 0.0, -4.0, 4.0, 0.0])
+
+
+class VectorEmotionGameCore:
+    """Balance_Game_Tuned 의 EmotionGameCore 를 N개 게임에 대해 NumPy 배열로 한 번에 진행"""
+
+    def __init__(self, num_games, hole_enabled=True, num_holes=8, auto_reset=True, seed=None, hole_margin=20,
+                 level_bank=None):
+        self.num_games = num_games
+        self.best_scores = []  # 전체 게임 통틀어 성공시 걸린 step top 10
+
+        self.WIDTH, self.HEIGHT = 1200, 1000
+        self.hole_enabled = hole_enabled
+        self.level_bank = level_bank  # Level_Bank.LevelBank: 있으면 리셋 때 미리 만든 레벨에서 뽑음
+        self.num_holes = num_holes if level_bank is None else level_bank.max_holes
+        self.hole_margin = hole_margin
+        self.auto_reset = auto_reset
+        self.reseed(seed)
+
+        # 바람 설정
+        self.wind_enabled = True
+        self.wind_update_interval = 100
+        self.wind_strength = np.full(num_games, 0.05)
+        self.wind_direction = np.ones(num_games)
+        self.wind_variation = np.full(num_games, 0.02)
+        self.frame_count = np.zeros(num_games, dtype=np.int64)
+
+        # 게임별 레벨 번호와 바람 일정 (레벨 뱅크가 없으면 일정 길이 0)
+        wind_steps = 0 if level_bank is None else level_bank.levels.dtype["wind_strength"].shape[0]
+        self.level = np.full(num_games, -1, dtype=np.int64)
+        self.wind_idx = np.zeros(num_games, dtype=np.int64)
+        self.wind_count = np.zeros(num_games, dtype=np.int64)
+        self.wind_schedule = np.zeros((num_games, wind_steps, 3))  # (세기, 방향, 변동)
+
+        # 막대 설정
+        self.bar_center_x = self.WIDTH // 2
+        self.bar_width = 450
+        self.bar_x0 = self.bar_center_x - self.bar_width // 2
+        self.bar_thickness = 6
+
+        # 공 물리 설정
+        self.ball_radius = 18
+        self.gravity = 0.3
+        self.friction = 0.995
+        self.bar_gravity = 0.2
+
+        # 구멍 배치 영역 (Balance_Game_Tuned 와 동일)
+        self.hole_region = (self.bar_x0, 200, self.bar_x0 + self.bar_width, self.HEIGHT - 200)
+
+        # 목표 영역 (pygame.Rect(WIDTH // 2 - 125, 40, 250, 80) 과 동일)
+        self.goal_left, self.goal_top = self.WIDTH // 2 - 125, 40
+        self.goal_right, self.goal_bottom = self.goal_left + 250, self.goal_top + 80
+        self.goal_centerx = self.goal_left + 250 // 2
+
+        # 게임별 상태 배열
+        self.bar_left_y = np.zeros(num_games)
+        self.bar_right_y = np.zeros(num_games)
+        self.ball_x = np.zeros(num_games)
+        self.ball_y = np.zeros(num_games)
+        self.ball_vx = np.zeros(num_games)
+        self.current_steps = np.zeros(num_games, dtype=np.int64)
+        self.game_over = np.zeros(num_games, dtype=bool)
+        self.success = np.zeros(num_games, dtype=bool)
+        self.holes = np.zeros((num_games, self.num_holes if hole_enabled else 0, 2))
+
+        # 구멍이 많으면 격자 인덱스로 공 근처 구멍만 검사 (리셋된 게임 줄만 다시 색인)
+        self.use_index = self.holes.shape[1] >= INDEX_MIN_HOLES
+        self.hole_index = BatchHoleIndex(num_games, cell_size=hole_cell_size(self.ball_radius),
+                                         width=self.WIDTH, height=self.HEIGHT)
+
+        self.reset()
+
+    def reseed(self, seed=None):
+        """전용 Philox 생성기를 새 시드로 교체하고 뽑아 둔 잡음 블록은 버림"""
+        self.rng = make_rng(seed)
+        self._noise = np.empty((0, self.num_games))  # 바람 잡음용 [0, 1) 균등난수 (행 = 스텝)
+        self._noise_pos = 0
+        self._noise_rng = np.zeros((), RNG_STATE_DTYPE)  # 잡음 블록을 뽑기 직전의 난수 상태 (스냅샷용)
+
+    def reset(self, mask=None, levels=None):
+        """mask 가 True 인 게임만 초기화 (None 이면 전체)
+
+        레벨 뱅크가 있으면 levels(초기화할 게임 수 길이) 의 레벨로, levels 가 없으면 뱅크에서 뽑은 레벨로 시작한다.
+        """
+        if mask is None:
+            idx = np.arange(self.num_games)
+        else:
+            idx = np.flatnonzero(mask)
+        n = len(idx)
+        if n == 0:
+            return
+
+        self.bar_left_y[idx] = self.HEIGHT - 100
+        self.bar_right_y[idx] = self.HEIGHT - 100
+        self.ball_x[idx] = self.bar_center_x + self.rng.uniform(-10, 10, n)
+        self.ball_y[idx] = self.bar_left_y[idx] - self.ball_radius - 5
+        self.ball_vx[idx] = 0.0
+        self.game_over[idx] = False
+        self.success[idx] = False
+        self.current_steps[idx] = 0
+
+        if self.level_bank is not None:
+            self._load_levels(idx, self.level_bank.sample(self.rng, n) if levels is None else np.asarray(levels))
+        elif self.hole_enabled:
+            # 구멍 랜덤 생성
+            self.holes[idx] = generate_layouts(self.rng, n, self.num_holes, region=self.hole_region,
+                                               ball_radius=self.ball_radius, margin=self.hole_margin)
+        if self.hole_enabled:
+            if self.use_index:
+                self.hole_index.build(self.holes, idx)
+
+    def _load_levels(self, idx, levels, wind_idx=0):
+        """idx 게임들에 레벨 뱅크 레벨을 읽어 옴 (memmap 에서 필요한 줄만 복사)"""
+        rec = self.level_bank.levels[levels]
+        self.level[idx] = levels
+        if self.hole_enabled:
+            self.holes[idx] = rec["holes"]
+        self.wind_idx[idx] = wind_idx
+        self.wind_count[idx] = rec["wind_count"]
+        self.wind_schedule[idx, :, 0] = rec["wind_strength"]
+        self.wind_schedule[idx, :, 1] = rec["wind_direction"]
+        self.wind_schedule[idx, :, 2] = rec["wind_variation"]
+
+    def step(self, actions):
+        """모든 게임에 액션 적용 후 한 프레임 진행, (game_over, success) 반환"""
+        actions = np.asarray(actions, dtype=np.int64)
+        self.bar_left_y += ACTION_LEFT_DY[actions]
+        self.bar_right_y += ACTION_RIGHT_DY[actions]
+        self.update()
+
+        game_over = self.game_over.copy()
+        success = self.success.copy()
+        if self.auto_reset:
+            self.reset(game_over)
+        return game_over, success
+
+    def update(self):
+        # Balance_Game_Tuned 와 동일하게 프레임 카운터는 스텝당 2 증가
+        self.frame_count += 2
+        self.current_steps += 1
+
+        profiling = PROFILER.enabled
+        if profiling:
+            PROFILER.start("wind")
+
+        # 바람 갱신 (주기적으로)
+        if self.wind_enabled:
+            refresh = np.flatnonzero(self.frame_count % self.wind_update_interval == 0)
+            if self.level_bank is not None and len(refresh):
+                # 레벨 바람 일정이 남은 게임은 일정대로, 나머지만 난수로
+                scheduled = refresh[self.wind_idx[refresh] < self.wind_count[refresh]]
+                wind = self.wind_schedule[scheduled, self.wind_idx[scheduled]]
+                self.wind_strength[scheduled] = wind[:, 0]
+                self.wind_direction[scheduled] = wind[:, 1]
+                self.wind_variation[scheduled] = wind[:, 2]
+                self.wind_idx[scheduled] += 1
+                refresh = np.setdiff1d(refresh, scheduled, assume_unique=True)
+            n = len(refresh)
+            if n:
+                self.wind_strength[refresh] = self.rng.uniform(0.02, 0.07, n)
+                self.wind_direction[refresh] = self.rng.choice([-1.0, 1.0], n)
+                self.wind_variation[refresh] = self.rng.uniform(0.005, 0.02, n)
+
+        # 바람 영향 계산
+        if self.wind_enabled:
+            wind_force = self.wind_strength * self.wind_direction
+            if self._noise_pos == len(self._noise):
+                pack_rng_state(self.rng, self._noise_rng)
+                self._noise = self.rng.random((max(NOISE_BLOCK // self.num_games, 1), self.num_games))
+                self._noise_pos = 0
+            u = self._noise[self._noise_pos]
+            self._noise_pos += 1
+            wind_force += self.wind_variation * (2.0 * u - 1.0)
+        else:
+            wind_force = np.zeros(self.num_games)
+
+        if profiling:
+            PROFILER.stop()
+            PROFILER.start("physics")
+
+        # 공의 움직임
+        slope = (self.bar_right_y - self.bar_left_y) / self.bar_width
+        ball_ax = slope * self.gravity
+        self.ball_vx += ball_ax + 0.5 * wind_force
+        self.ball_vx *= self.friction
+        self.ball_x += self.ball_vx
+
+        # 공의 y좌표
+        self.ball_y = self.bar_left_y + (self.ball_x - self.bar_x0) * slope - self.ball_radius - 5
+
+        # 막대 중력
+        self.bar_left_y += self.bar_gravity
+        self.bar_right_y += self.bar_gravity
+        np.clip(self.bar_left_y, self.goal_bottom, self.HEIGHT, out=self.bar_left_y)
+        np.clip(self.bar_right_y, self.goal_bottom, self.HEIGHT, out=self.bar_right_y)
+
+        # 게임 판정
+        fell_off = (self.ball_x < self.bar_x0) | (self.ball_x > self.bar_x0 + self.bar_width)
+        in_goal = self.is_in_goal(self.ball_x, self.ball_y)
+        self.game_over = fell_off | self.is_in_hole(self.ball_x, self.ball_y) | in_goal
+        self.success = in_goal
+
+        # Best 10 스코어 갱신
+        if in_goal.any():
+            self.best_scores.extend(self.current_steps[in_goal].tolist())
+            self.best_scores = sorted(self.best_scores)[:10]
+
+        if profiling:
+            PROFILER.stop()
+
+    def snapshot(self, out=None):
+        """게임별 상태를 (num_games,) 레코드 배열(Game_State.state_dtype)로 저장
+
+        난수 생성기는 배치 전체가 공유하므로 모든 줄에 같은 상태가 들어간다.
+        """
+        rec = np.zeros(self.num_games, state_dtype(self.num_holes)) if out is None else out
+        rec["ball_x"] = self.ball_x
+        rec["ball_y"] = self.ball_y
+        rec["ball_vx"] = self.ball_vx
+        rec["bar_left_y"] = self.bar_left_y
+        rec["bar_right_y"] = self.bar_right_y
+        rec["wind_strength"] = self.wind_strength
+        rec["wind_direction"] = self.wind_direction
+        rec["wind_variation"] = self.wind_variation
+        rec["frame_count"] = self.frame_count
+        rec["current_steps"] = self.current_steps
+        rec["game_over"] = self.game_over
+        rec["success"] = self.success
+        hole_count = self.holes.shape[1]
+        rec["hole_count"] = hole_count
+        rec["holes"][:, :hole_count] = self.holes
+        rec["level"] = self.level
+        rec["wind_idx"] = self.wind_idx
+        pack_rng_state(self.rng, rec["rng"])
+        rec["noise_rng"] = self._noise_rng
+        rec["noise_len"] = len(self._noise)
+        rec["noise_pos"] = self._noise_pos
+        return rec
+
+    def restore(self, rec, mask=None):
+        """snapshot() 레코드로 복원
+
+        mask 가 None 이면 전체 게임과 난수 상태까지 복원해 저장 시점과 똑같이 진행된다.
+        mask 를 주면 True 인 게임만 rec 의 같은 위치 줄로 덮어쓰고 난수 상태는 그대로 둔다.
+        """
+        idx = slice(None) if mask is None else np.flatnonzero(mask)
+        rows = rec[idx]
+        self.ball_x[idx] = rows["ball_x"]
+        self.ball_y[idx] = rows["ball_y"]
+        self.ball_vx[idx] = rows["ball_vx"]
+        self.bar_left_y[idx] = rows["bar_left_y"]
+        self.bar_right_y[idx] = rows["bar_right_y"]
+        self.wind_strength[idx] = rows["wind_strength"]
+        self.wind_direction[idx] = rows["wind_direction"]
+        self.wind_variation[idx] = rows["wind_variation"]
+        self.frame_count[idx] = rows["frame_count"]
+        self.current_steps[idx] = rows["current_steps"]
+        self.game_over[idx] = rows["game_over"]
+        self.success[idx] = rows["success"]
+        self.holes[idx] = rows["holes"][:, :self.holes.shape[1]]
+        self.level[idx] = rows["level"]
+        self.wind_idx[idx] = rows["wind_idx"]
+        if self.level_bank is not None:
+            banked = np.flatnonzero(self.level[idx] >= 0)
+            rows_idx = np.arange(self.num_games)[idx][banked]
+            self._load_levels(rows_idx, self.level[rows_idx], self.wind_idx[rows_idx])
+        if self.use_index:
+            self.hole_index.build(self.holes, None if mask is None else idx)
+        if mask is not None:
+            return
+
+        unpack_rng_state(rec[0]["rng"], self.rng)
+        noise_len = int(rec[0]["noise_len"])
+        self._noise_rng[...] = rec[0]["noise_rng"]
+        if noise_len:
+            self._noise = unpack_rng_state(rec[0]["noise_rng"]).random((noise_len, self.num_games))
+        else:
+            self._noise = np.empty((0, self.num_games))
+        self._noise_pos = int(rec[0]["noise_pos"]) if noise_len else 0
+
+    def is_in_hole(self, x, y):
+        if self.holes.shape[1] == 0:
+            return np.zeros(self.num_games, dtype=bool)
+        holes = self.hole_index.gather(x, y) if self.use_index else self.holes
+        dx = x[:, None] - holes[:, :, 0]
+        dy = y[:, None] - holes[:, :, 1]
+        dist = np.hypot(dx, dy)
+        # np.hypot 은 math.hypot 과 마지막 자리가 가끔 달라서, 경계 근처만 스칼라 코어와 같은 값으로 보정
+        edge = np.abs(dist - self.ball_radius) < 1e-9
+        if edge.any():
+            dist[edge] = hypot(dx[edge], dy[edge])
+        return (dist < self.ball_radius).any(axis=1)
+
+    def is_in_goal(self, x, y):
+        return ((x >= self.goal_left) & (x < self.goal_right)
+                & (y >= self.goal_top) & (y < self.goal_bottom))
+
+
+def validate_holes(n=20_000, seed=0, num_holes=8):
+    """구멍 판정 회귀 검사: 경계 바로 위의 점에서 벡터 코어 == 스칼라 코어 (파이썬/JIT)
+
+    구멍 중심에서 ball_radius 만큼 떨어진 점을 좌표마다 0~2ulp 흔들어 뽑는다.
+    격자 인덱스 경로와 전체 비교 경로를 모두 검사한다. 반환: 불일치 점 수
+    """
+    from Balance_Game_Tuned import EmotionGameCore
+
+    rng = np.random.default_rng(seed)
+    core = VectorEmotionGameCore(n, num_holes=num_holes, seed=seed, auto_reset=False)
+    k = rng.integers(num_holes, size=n)
+    theta = rng.uniform(0, 2 * np.pi, n)
+    hx, hy = core.holes[np.arange(n), k].T
+    x = hx + core.ball_radius * np.cos(theta)
+    y = hy + core.ball_radius * np.sin(theta)
+    x += rng.integers(-2, 3, n) * np.spacing(x)
+    y += rng.integers(-2, 3, n) * np.spacing(y)
+
+    core.hole_index.build(core.holes)
+    vector = []
+    for use_index in (False, True):
+        core.use_index = use_index
+        vector.append(core.is_in_hole(x, y))
+
+    rec = core.snapshot()
+    scalar = EmotionGameCore(headless=True, num_holes=num_holes)
+    mismatch = 0
+    for i in range(n):
+        scalar.restore(rec[i])
+        results = {bool(v[i]) for v in vector}
+        for use_jit in (False, True):
+            scalar.use_jit = use_jit
+            results.add(bool(scalar.is_in_hole(x[i].item(), y[i].item())))
+        mismatch += len(results) > 1
+    return mismatch
+
+
+if __name__ == "__main__":
+    n = 20_000
+    print(f"구멍 경계 판정 검사: {n}개 점 중 불일치 {validate_holes(n)}개")
@@ -0,0 +1,259 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# 변형별 (게임 모듈, 환경 모듈)
+VARIANTS = {
+    "basic": ("Balance_Game_basic", "Env_Rainforce_basic"),
+    "base": ("Balance_Game", "Env_Rainforce"),
+    "Active": ("Balance_Game_Active", "Env_Rainforce_Active"),
+    "Tuned": ("Balance_Game_Tuned", "Env_Rainforce_Tuned"),
+}
+
+
+def _spread(runs):
+    """반복 측정값의 상대 범위 (max - min) / 중앙값: 이보다 작은 변화는 잡음으로 봄"""
+    return (max(runs) - min(runs)) / float(np.median(runs)) if len(runs) > 1 else 0.0
+
+
+def _measure(step, n_steps, n_alloc_steps, repeats=1):
+    """step() 을 n_steps 번씩 repeats 번 돌려 속도 중앙값을 재고, 별도로 n_alloc_steps 번 할당량을 잰다"""
+    for _ in range(min(1000, n_steps)):  # 워밍업
+        step()
+
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(n_steps):
+            step()
+        runs.append(n_steps / (time.perf_counter() - start))
+    steps_per_sec = float(np.median(runs))
+
+    # 스텝 하나 동안 추가로 잡힌 메모리 최대치 (tracemalloc peak - 시작 시점)
+    tracemalloc.start()
+    alloc = 0
+    for _ in range(n_alloc_steps):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        step()
+        alloc += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    return {
+        "steps_per_sec": steps_per_sec,
+        "us_per_step": 1e6 / steps_per_sec,
+        "alloc_bytes_per_step": alloc / max(n_alloc_steps, 1),
+        "runs": runs,
+    }
+
+
+def bench_game_update(variant, n_steps, n_alloc_steps, repeats=1):
+    game_module = importlib.import_module(VARIANTS[variant][0])
+    game = game_module.EmotionGameCore(hole_enabled=True, headless=True)
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, 3, 4096).tolist()
+    i = 0
+
+    def step():
+        nonlocal i
+        game.apply_action(actions[i & 4095])
+        game.update()
+        if game.game_over:
+            game.reset()
+        i += 1
+
+    return _measure(step, n_steps, n_alloc_steps, repeats)
+
+
+def bench_env_step(variant, n_steps, n_alloc_steps, repeats=1):
+    env_module = importlib.import_module(VARIANTS[variant][1])
+    env = env_module.EmotionBalanceEnv(enabled=False)
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, 3, 4096).tolist()
+    i = 0
+
+    def step():
+        nonlocal i
+        _, _, done, _, _ = env.step(actions[i & 4095])
+        if done:
+            env.reset()
+        i += 1
+
+    return _measure(step, n_steps, n_alloc_steps, repeats)
+
+
+def bench_reward(variant, n_steps, n_alloc_steps, repeats=1):
+    """보상 계산만 따로: 실제 롤아웃에서 모은 상태를 돌려가며 _compute_reward 호출"""
+    env_module = importlib.import_module(VARIANTS[variant][1])
+    env = env_module.EmotionBalanceEnv(enabled=False)
+    env.reset(seed=0)
+    game = env.game
+    rng = np.random.default_rng(0)
+    states = []
+    while len(states) < 4096:
+        prev_y = env.prev_y
+        _, _, done, _, _ = env.step(int(rng.integers(0, 3)))
+        if done:
+            env.reset()
+        else:
+            states.append((game.ball_x, game.ball_y, prev_y))
+    i = 0
+
+    def step():
+        nonlocal i
+        game.ball_x, game.ball_y, env.prev_y = states[i & 4095]
+        env._compute_reward()
+        i += 1
+
+    return _measure(step, n_steps, n_alloc_steps, repeats)
+
+
+def bench_vec_env_step(num_envs, n_steps, n_alloc_steps, repeats=1):
+    """Tuned 배치 환경: 결과는 게임 1개 스텝 기준으로 환산"""
+    from Env_Rainforce_Vec import EmotionBalanceVecEnv
+
+    env = EmotionBalanceVecEnv(num_envs=num_envs, seed=0)
+    env.reset()
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, 3, (64, num_envs))
+    i = 0
+
+    def step():
+        nonlocal i
+        env.step(actions[i & 63])
+        i += 1
+
+    n_calls = max(n_steps // num_envs, 10)
+    result = _measure(step, n_calls, max(n_alloc_steps // num_envs, 10), repeats)
+    result["steps_per_sec"] *= num_envs
+    result["runs"] = [r * num_envs for r in result["runs"]]
+    result["us_per_step"] /= num_envs
+    result["alloc_bytes_per_step"] /= num_envs
+    return result
+
+
+def bench_learn(variant, n_steps, repeats=1):
+    """DQN learn() 처리량 (고정 스텝 수, 매번 새 모델로 repeats 번)"""
+    from stable_baselines3 import DQN
+    from stable_baselines3.common.monitor import Monitor
+    from gymnasium.wrappers import TimeLimit
+
+    if variant == "Tuned_vec":
+        from Env_Rainforce_Vec import EmotionBalanceVecEnv
+        env = EmotionBalanceVecEnv(num_envs=16, seed=0)
+    else:
+        env_module = importlib.import_module(VARIANTS[variant][1])
+        env = Monitor(TimeLimit(env_module.EmotionBalanceEnv(enabled=False), max_episode_steps=1000))
+
+    runs = []
+    for _ in range(repeats):
+        model = DQN("MlpPolicy", env, learning_starts=min(1000, n_steps // 2), buffer_size=50000,
+                    batch_size=128, train_freq=4, seed=0, device="cpu", verbose=0)
+        start = time.perf_counter()
+        model.learn(total_timesteps=n_steps)
+        runs.append(model.num_timesteps / (time.perf_counter() - start))
+    steps_per_sec = float(np.median(runs))
+    return {
+        "steps_per_sec": steps_per_sec,
+        "us_per_step": 1e6 / steps_per_sec,
+        "runs": runs,
+    }
+
+
+def run(args):
+    results = {}
+    for variant in args.variants:
+        # 일부 게임 코드가 stdout 으로 로그를 찍으므로 측정 중에는 버림
+        with contextlib.redirect_stdout(io.StringIO()):
+            if variant == "Tuned_vec":
+                results[f"{variant}/env_step"] = bench_vec_env_step(args.num_envs, args.steps, args.alloc_steps,
+                                                                    args.repeats)
+            else:
+                results[f"{variant}/game_update"] = bench_game_update(variant, args.steps, args.alloc_steps,
+                                                                      args.repeats)
+                results[f"{variant}/env_step"] = bench_env_step(variant, args.steps, args.alloc_steps, args.repeats)
+                results[f"{variant}/reward"] = bench_reward(variant, args.steps, args.alloc_steps, args.repeats)
+            if args.learn_steps > 0:
+                results[f"{variant}/learn"] = bench_learn(variant, args.learn_steps, args.repeats)
+        for key in [k for k in results if k.startswith(variant + "/")]:
+            r = results[key]
+            alloc = f"{r['alloc_bytes_per_step']:10.1f} B" if "alloc_bytes_per_step" in r else ""
+            print(f"{key:24s} {r['steps_per_sec']:14,.0f} steps/s (±{_spread(r['runs']):5.1%}) "
+                  f"{r['us_per_step']:10.3f} us/step {alloc}")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """기준 결과 대비 steps/s 중앙값이 threshold 비율과 측정 잡음을 모두 넘게 떨어진 항목 반환
+
+    잡음은 기준/이번 측정 중 반복 간 상대 범위가 큰 쪽 (반복값이 없는 예전 결과는 0).
+    """
+    regressions = []
+    for key, base in baseline["results"].items():
+        if key not in results:
+            continue
+        change = results[key]["steps_per_sec"] / base["steps_per_sec"] - 1.0
+        noise = max(_spread(base.get("runs", [])), _spread(results[key]["runs"]))
+        flag = "REGRESSION" if change < -max(threshold, noise) else ""
+        print(f"{key:24s} {base['steps_per_sec']:14,.0f} -> {results[key]['steps_per_sec']:14,.0f} "
+              f"({change:+.1%}, 잡음 ±{noise:.1%}) {flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="게임/환경/학습 성능 측정")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS) + ["Tuned_vec"],
+                        choices=list(VARIANTS) + ["Tuned_vec"])
+    parser.add_argument("--steps", type=int, default=50_000, help="반복 1회당 측정 스텝 수")
+    parser.add_argument("--repeats", type=int, default=5, help="속도 측정 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--alloc-steps", type=int, default=2_000, help="할당량 측정 스텝 수")
+    parser.add_argument("--num-envs", type=int, default=256, help="Tuned_vec 배치 크기")
+    parser.add_argument("--learn-steps", type=int, default=0, help="DQN learn() 측정 스텝 수 (0 이면 생략)")
+    parser.add_argument("--output", default="bench_results.json", help="결과 JSON 경로")
+    parser.add_argument("--compare", help="비교할 기준 결과 JSON 경로")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="회귀로 볼 steps/s 감소 비율 (측정 잡음보다 작으면 잡음 기준)")
+    args = parser.parse_args()
+
+    results = run(args)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "steps": args.steps,
+            "repeats": args.repeats,
+            "num_envs": args.num_envs,
+            "learn_steps": args.learn_steps,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"결과 저장: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n기준 대비 비교 ({args.compare}, 허용 감소 {args.threshold:.0%} 또는 측정 잡음)")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"⚠️ 성능 회귀 {len(regressions)}건: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ 성능 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import copy
+import os
+import queue
+import random
+import shutil
+import threading
+import time
+
+import numpy as np
+import torch
+from stable_baselines3 import DQN
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.save_util import save_to_zip_file
+
+LATEST = "latest"  # 마지막으로 다 쓴 체크포인트 이름이 적힌 파일
+
+
+def _buffer_state(buffer, window):
+    """리플레이 버퍼의 쓰기 위치 등 스칼라 상태 + 배열 복사본
+
+    파일 매핑 버퍼는 파일 자체가 저장소라 전체를 복사하지 않고, 다음 체크포인트 전에
+    덮어쓸 window 줄과 문맥 테이블만 복사한다 (MemmapReplayBuffer.checkpoint_arrays).
+    """
+    state = {k: v for k, v in vars(buffer).items() if isinstance(v, (bool, int, np.integer, np.bool_))}
+    env_arrays = [k for k in ("_env_episode", "_env_final") if hasattr(buffer, k)]
+    for k in env_arrays:
+        state[k] = getattr(buffer, k).copy()
+    if hasattr(buffer, "checkpoint_arrays"):
+        arrays = buffer.checkpoint_arrays(window)
+    else:
+        arrays = {k: v.copy() for k, v in vars(buffer).items() if isinstance(v, np.ndarray) and k not in env_arrays}
+    return state, arrays
+
+
+def _capture(model, window=0):
+    """학습 루프를 멈춘 짧은 순간에 필요한 상태를 전부 복사 (직렬화/압축은 하지 않음)"""
+    data = model.__dict__.copy()
+    exclude = set(model._excluded_save_params())
+    state_dicts, torch_vars = model._get_torch_save_params()
+    exclude.update(name.split(".")[0] for name in state_dicts + torch_vars)
+    for name in exclude:
+        data.pop(name, None)
+    data = copy.deepcopy(data)
+    params = copy.deepcopy(model.get_parameters())  # 정책(온라인/타깃망) + 옵티마이저 텐서 복제
+
+    env = model.get_env()
+    extras = {
+        "num_timesteps": model.num_timesteps,
+        "numpy_rng": np.random.get_state(),
+        "python_rng": random.getstate(),
+        "torch_rng": torch.get_rng_state(),
+        "cuda_rng": torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+        "action_space_rng": copy.deepcopy(model.action_space.np_random.bit_generator.state),  # 탐험 무작위 액션
+        "env_state": env.snapshot() if hasattr(env, "snapshot") else None,
+    }
+    buffer_arrays = {}
+    if model.replay_buffer is not None:
+        extras["buffer_state"], buffer_arrays = _buffer_state(model.replay_buffer, window)
+    return data, params, extras, buffer_arrays
+
+
+def _write(directory, name, captured, flush_buffer, keep):
+    """백그라운드 스레드: 임시 디렉터리에 다 쓴 뒤 이름을 바꿔 교체"""
+    data, params, extras, buffer_arrays = captured
+    tmp = os.path.join(directory, f".{name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    save_to_zip_file(os.path.join(tmp, "model.zip"), data=data, params=params)
+    torch.save(extras, os.path.join(tmp, "extras.pt"))
+    if buffer_arrays:
+        np.savez_compressed(os.path.join(tmp, "buffer.npz"), **buffer_arrays)
+    if flush_buffer is not None:
+        flush_buffer()
+
+    final = os.path.join(directory, name)
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(tmp, final)
+    with open(os.path.join(directory, LATEST + ".tmp"), "w") as f:
+        f.write(name)
+    os.replace(os.path.join(directory, LATEST + ".tmp"), os.path.join(directory, LATEST))
+
+    # 오래된 체크포인트 정리
+    names = sorted((d for d in os.listdir(directory) if d.startswith("step_")), key=lambda d: int(d[5:]))
+    for old in names[:-keep]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+
+class AsyncCheckpointCallback(BaseCallback):
+    """save_freq 스텝마다 정책/타깃망/옵티마이저/탐험 진행/난수/환경/리플레이 버퍼 상태를 저장
+
+    학습 스레드는 상태를 메모리에 복사만 하고, 직렬화/압축/파일 쓰기는 백그라운드 스레드가 한다.
+    이전 체크포인트를 아직 쓰는 중이면 이번 것은 건너뛴다 (skipped 로 셈).
+    저장 시점은 수집 시작(_on_rollout_start) 이라 resume() 후 학습 순서가 그대로 이어진다.
+    파일 매핑 리플레이 버퍼는 체크포인트 간격 두 번 분량의 줄을 함께 저장하므로,
+    그 안에서 죽었다면 재개가 그대로 이어지고 더 지나서 죽었다면 되돌릴 수 없는 줄만 샘플에서 빠진다.
+    """
+
+    def __init__(self, save_freq, directory="./checkpoints/", keep=3, verbose=0):
+        super().__init__(verbose)
+        self.save_freq = save_freq
+        self.directory = directory
+        self.keep = keep
+        self.skipped = 0
+        self._last_saved = 0
+        self._queue = queue.Queue(maxsize=1)
+        self._thread = None
+
+    def _init_callback(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._last_saved = self.model.num_timesteps
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            start = time.perf_counter()
+            try:
+                _write(self.directory, *job, keep=self.keep)
+                if self.verbose:
+                    print(f"💾 체크포인트 저장: {job[0]} ({time.perf_counter() - start:.2f}초)")
+            except Exception as e:  # 저장 실패로 학습을 멈추지는 않음
+                print(f"⚠️ 체크포인트 저장 실패 ({job[0]}): {e}")
+            finally:
+                self._queue.task_done()
+
+    def _on_rollout_start(self):
+        if self.model.num_timesteps - self._last_saved >= self.save_freq:
+            self.save()
+
+    def _on_step(self):
+        return True
+
+    def save(self):
+        """지금 상태를 체크포인트로 큐에 넣음 (쓰는 중이면 건너뜀)"""
+        if self._queue.full():
+            self.skipped += 1
+            return False
+        self._last_saved = self.model.num_timesteps
+        buffer = self.model.replay_buffer
+        flush_buffer = getattr(buffer, "flush", None)
+        window = 2 * -(-self.save_freq // self.model.n_envs)  # 건너뛴 체크포인트 하나까지 대비
+        self._queue.put((f"step_{self.model.num_timesteps}", _capture(self.model, window), flush_buffer))
+        return True
+
+    def wait(self):
+        """쓰는 중인 체크포인트가 끝날 때까지 대기"""
+        self._queue.join()
+
+    def _on_training_end(self):
+        self.wait()
+
+
+def latest_checkpoint(directory="./checkpoints/"):
+    """마지막으로 다 쓴 체크포인트 경로 (없으면 None)"""
+    try:
+        with open(os.path.join(directory, LATEST)) as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def resume(path, env, device="auto", **kwargs):
+    """체크포인트(디렉터리 또는 그 상위 checkpoints 디렉터리)에서 DQN 모델을 되살림
+
+    환경이 snapshot/restore 를 지원하면(EmotionBalanceVecEnv) 게임 상태까지 복원해
+    model.learn(남은 스텝, reset_num_timesteps=False) 가 중단 지점부터 그대로 이어진다.
+    그렇지 않은 환경은 처음 learn() 때 reset 된다.
+    """
+    if os.path.exists(os.path.join(path, LATEST)):
+        path = latest_checkpoint(path)
+    extras = torch.load(os.path.join(path, "extras.pt"), weights_only=False)
+    env_state = extras["env_state"]
+    restore_env = env_state is not None and hasattr(env, "restore")
+    model = DQN.load(os.path.join(path, "model.zip"), env=env, device=device, force_reset=not restore_env, **kwargs)
+    if restore_env:
+        env.restore(env_state)
+
+    # 리플레이 버퍼: 메모리 버퍼는 배열을, 파일 매핑 버퍼는 체크포인트 뒤에 덮어쓴 줄을 되돌림
+    buffer = model.replay_buffer
+    if buffer is not None and "buffer_state" in extras:
+        buffer_file = os.path.join(path, "buffer.npz")
+        arrays = {}
+        if os.path.exists(buffer_file):
+            with np.load(buffer_file) as f:
+                arrays = {k: f[k] for k in f.files}
+        if hasattr(buffer, "restore_checkpoint"):
+            buffer.restore_checkpoint(extras["buffer_state"], arrays)
+        else:
+            for k, v in extras["buffer_state"].items():
+                if k in ("_env_episode", "_env_final"):
+                    getattr(buffer, k)[:] = v
+                else:
+                    setattr(buffer, k, v)
+            for k, v in arrays.items():
+                setattr(buffer, k, v)
+
+    # DQN.load 가 seed 로 다시 시드한 난수들을 저장 시점 상태로 되돌림
+    model.action_space.np_random.bit_generator.state = extras["action_space_rng"]
+    np.random.set_state(extras["numpy_rng"])
+    random.setstate(extras["python_rng"])
+    torch.set_rng_state(extras["torch_rng"])
+    if extras["cuda_rng"] is not None and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(extras["cuda_rng"])
+    return model
@@ -0,0 +1,276 @@
+import multiprocessing as mp
+import traceback
+from multiprocessing import shared_memory
+import numpy as np
+from gymnasium.wrappers import TimeLimit
+from stable_baselines3.common.vec_env import VecEnv, DummyVecEnv, VecMonitor
+from Game_Random import spawn_seeds
+
+# 워커 명령 코드 (공유 메모리의 command 칸에 기록)
+CMD_STEP, CMD_RESET, CMD_CALL, CMD_CLOSE = 1, 2, 3, 4
+WAIT_TIMEOUT = 1.0  # 워커 응답을 기다리며 워커가 살아 있는지 확인하는 간격 (초)
+
+
+def _layout(num_envs, obs_dim, num_workers):
+    """공유 블록 안의 배열 배치: 이름 -> (offset, dtype, shape)"""
+    fields = [
+        ("actions", np.int64, (num_envs,)),
+        ("seeds", np.int64, (num_envs,)),
+        ("command", np.int64, (num_workers,)),
+        ("error", np.bool_, (num_workers,)),  # step/reset 중 예외 (내용은 파이프로)
+        ("obs", np.float32, (num_envs, obs_dim)),
+        ("terminal_obs", np.float32, (num_envs, obs_dim)),
+        ("rewards", np.float32, (num_envs,)),
+        ("dones", np.bool_, (num_envs,)),
+        ("truncated", np.bool_, (num_envs,)),
+        ("success", np.bool_, (num_envs,)),
+        ("episode_return", np.float64, (num_envs,)),
+        ("episode_length", np.int64, (num_envs,)),
+        ("episode_time", np.float64, (num_envs,)),
+    ]
+    layout, offset = {}, 0
+    for name, dtype, shape in fields:
+        offset = (offset + 7) // 8 * 8  # 8바이트 정렬
+        layout[name] = (offset, dtype, shape)
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return layout, offset
+
+
+def _attach(shm, layout):
+    return {name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            for name, (offset, dtype, shape) in layout.items()}
+
+
+class ScalarEnvSlice:
+    """gym.Env 클래스를 받아 워커 한 개 분량의 VecEnv 를 만드는 팩토리 (pickle 가능)"""
+
+    def __init__(self, env_cls, max_episode_steps=1000, **env_kwargs):
+        self.env_cls = env_cls
+        self.max_episode_steps = max_episode_steps
+        self.env_kwargs = env_kwargs
+
+    def _make(self):
+        return TimeLimit(self.env_cls(**self.env_kwargs), max_episode_steps=self.max_episode_steps)
+
+    def __call__(self, num_envs):
+        return VecMonitor(DummyVecEnv([self._make for _ in range(num_envs)]))
+
+
+def _worker(index, start, stop, vec_env_fn, shm_name, layout, cmd_ready, work_done, pipe):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buf = _attach(shm, layout)
+    venv = vec_env_fn(stop - start)
+    sl = slice(start, stop)
+
+    try:
+        while True:
+            cmd_ready.acquire()
+            cmd = buf["command"][index]
+
+            if cmd == CMD_CLOSE:
+                venv.close()
+                break
+
+            # 예외가 나도 work_done 은 항상 풀어 학습 쪽이 멈추지 않게 하고, 내용은 파이프로 보냄
+            try:
+                if cmd == CMD_STEP:
+                    obs, rewards, dones, infos = venv.step(buf["actions"][sl])
+                    buf["obs"][sl] = obs
+                    buf["rewards"][sl] = rewards
+                    buf["dones"][sl] = dones
+                    for i in np.flatnonzero(dones):
+                        info = infos[i]
+                        j = start + i
+                        buf["terminal_obs"][j] = info["terminal_observation"]
+                        buf["truncated"][j] = info.get("TimeLimit.truncated", False)
+                        buf["success"][j] = info.get("is_success", info.get("success", False))
+                        buf["episode_return"][j] = info["episode"]["r"]
+                        buf["episode_length"][j] = info["episode"]["l"]
+                        buf["episode_time"][j] = info["episode"]["t"]
+
+                elif cmd == CMD_RESET:
+                    seed = int(buf["seeds"][start])
+                    if seed >= 0:
+                        venv.seed(seed)
+                    buf["obs"][sl] = venv.reset()
+
+                elif cmd == CMD_CALL:
+                    # get_attr/set_attr/env_method 처럼 드문 호출만 파이프로 주고받음 (결과에 "ok"/"error" 표시)
+                    kind, name, args, kwargs, indices = pipe.recv()
+                    local = [i - start for i in indices if start <= i < stop]
+                    try:
+                        if kind == "get_attr":
+                            result = venv.get_attr(name, local)
+                        elif kind == "set_attr":
+                            venv.set_attr(name, args[0], local)
+                            result = None
+                        elif kind == "env_is_wrapped":
+                            result = venv.env_is_wrapped(args[0], local)
+                        else:
+                            result = venv.env_method(name, *args, indices=local, **kwargs)
+                        pipe.send(("ok", result))
+                    except Exception:
+                        pipe.send(("error", traceback.format_exc()))
+            except Exception:
+                buf["error"][index] = True
+                pipe.send(("error", traceback.format_exc()))
+
+            work_done.release()
+    finally:
+        del buf
+        shm.close()
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """여러 워커 프로세스가 환경을 나눠 진행하고 관측/보상/done 을 공유 메모리로 주고받는 VecEnv
+
+    vec_env_fn(num_envs) 는 워커 안에서 자기 몫의 VecEnv 를 만든다 (pickle 가능해야 함).
+    매 스텝 액션과 결과는 공유 블록에 직접 쓰고 읽으므로 pickle 이 없다.
+    """
+
+    def __init__(self, vec_env_fn, num_envs, num_workers, start_method=None):
+        probe = vec_env_fn(1)
+        observation_space, action_space = probe.observation_space, probe.action_space
+        self.render_mode = None
+        probe.close()
+
+        self.num_workers = num_workers
+        obs_dim = int(np.prod(observation_space.shape))
+        self.layout, size = _layout(num_envs, obs_dim, num_workers)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.buf = _attach(self.shm, self.layout)
+        self.buf["seeds"][:] = -1
+
+        # 워커별 연속 구간 [start, stop)
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        self.slices = list(zip(bounds[:-1], bounds[1:]))
+
+        ctx = mp.get_context(start_method)
+        self.cmd_ready = [ctx.Semaphore(0) for _ in range(num_workers)]
+        self.work_done = [ctx.Semaphore(0) for _ in range(num_workers)]
+        self.pipes, self.processes = [], []
+        for w, (start, stop) in enumerate(self.slices):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_worker,
+                                  args=(w, start, stop, vec_env_fn, self.shm.name, self.layout,
+                                        self.cmd_ready[w], self.work_done[w], child),
+                                  daemon=True)
+            process.start()
+            child.close()
+            self.pipes.append(parent)
+            self.processes.append(process)
+        self.closed = False
+
+        super().__init__(num_envs, observation_space, action_space)
+
+    def _broadcast(self, cmd, workers=None):
+        workers = range(self.num_workers) if workers is None else workers
+        for w in workers:
+            self.buf["command"][w] = cmd
+            self.cmd_ready[w].release()
+
+    def _check_alive(self, w):
+        process = self.processes[w]
+        if not process.is_alive():
+            self.close()
+            raise RuntimeError(f"환경 워커 {w} 가 종료되었습니다 (exit code {process.exitcode})")
+
+    def _wait(self, workers=None):
+        """워커 작업 완료 대기 (죽은 워커/워커 예외는 환경을 닫고 RuntimeError 로 다시 던짐)"""
+        workers = range(self.num_workers) if workers is None else workers
+        for w in workers:
+            while not self.work_done[w].acquire(timeout=WAIT_TIMEOUT):
+                self._check_alive(w)
+
+        failed = [w for w in workers if self.buf["error"][w]]
+        if failed:
+            messages = [f"[worker {w}]\n{self._recv(w)[1]}" for w in failed]
+            self.close()
+            raise RuntimeError("환경 워커에서 예외가 발생했습니다:\n" + "\n".join(messages))
+
+    def _recv(self, w):
+        pipe = self.pipes[w]
+        while not pipe.poll(WAIT_TIMEOUT):
+            self._check_alive(w)
+        return pipe.recv()
+
+    def reset(self):
+        # 워커마다 기준 시드에서 파생한 독립 시드를 넘김 (워커 수가 같으면 재현 가능)
+        seed = next((s for s in self._seeds if s is not None), None)
+        worker_seeds = [None] * self.num_workers if seed is None else spawn_seeds(seed, self.num_workers)
+        for (start, _), worker_seed in zip(self.slices, worker_seeds):
+            self.buf["seeds"][start] = -1 if worker_seed is None else worker_seed
+        self._reset_seeds()
+        self._reset_options()
+
+        self._broadcast(CMD_RESET)
+        self._wait()
+        return self.buf["obs"].copy()
+
+    def step_async(self, actions):
+        self.buf["actions"][:] = np.asarray(actions).reshape(self.num_envs)
+        self._broadcast(CMD_STEP)
+
+    def step_wait(self):
+        self._wait()
+        buf = self.buf
+        dones = buf["dones"].copy()
+        infos = [{} for _ in range(self.num_envs)]
+        for i in np.flatnonzero(dones):
+            infos[i] = {
+                "success": bool(buf["success"][i]),
+                "is_success": bool(buf["success"][i]),
+                "terminal_observation": buf["terminal_obs"][i].copy(),
+                "TimeLimit.truncated": bool(buf["truncated"][i]),
+                "episode": {"r": float(buf["episode_return"][i]),
+                            "l": int(buf["episode_length"][i]),
+                            "t": float(buf["episode_time"][i])},
+            }
+        return buf["obs"].copy(), buf["rewards"].copy(), dones, infos
+
+    def close(self):
+        if self.closed:
+            return
+        self._broadcast(CMD_CLOSE)
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():  # close 중에 멈춘 워커
+                process.terminate()
+                process.join()
+        del self.buf
+        self.shm.close()
+        self.shm.unlink()
+        self.closed = True
+
+    def _call(self, kind, name, args, kwargs, indices):
+        indices = list(range(self.num_envs)) if indices is None else (
+            [indices] if isinstance(indices, int) else list(indices))
+        workers = [w for w, (start, stop) in enumerate(self.slices)
+                   if any(start <= i < stop for i in indices)]
+        for w in workers:
+            self.pipes[w].send((kind, name, args, kwargs, indices))
+        self._broadcast(CMD_CALL, workers)
+        results, errors = [], []
+        for w in workers:
+            status, value = self._recv(w)
+            if status == "ok":
+                results.extend(value or [])
+            else:
+                errors.append(f"[worker {w}]\n{value}")
+        self._wait(workers)
+        if errors:
+            raise RuntimeError(f"{kind}({name!r}) 호출 중 워커에서 예외가 발생했습니다:\n" + "\n".join(errors))
+        return results
+
+    def get_attr(self, attr_name, indices=None):
+        return self._call("get_attr", attr_name, (), {}, indices)
+
+    def set_attr(self, attr_name, value, indices=None):
+        self._call("set_attr", attr_name, (value,), {}, indices)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return self._call("env_method", method_name, method_args, method_kwargs, indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        # 래퍼는 워커 안의 env 에 씌워져 있으므로 get_attr 처럼 워커에 물어봄 (wrapper_class 는 pickle 가능해야 함)
+        return self._call("env_is_wrapped", None, (wrapper_class,), {}, indices)
@@ -0,0 +1,170 @@
+import io
+import multiprocessing as mp
+import os
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+import torch
+from stable_baselines3.common.callbacks import BaseCallback
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+
+from Evaluation import evaluate_batched, summarize
+
+
+def _eval_worker(model_bytes, buffer_settings, shm_name, n_params, n_episodes, num_envs, max_steps, seed,
+                 best_model_save_path, log_path, idle, commands, results):
+    """평가 프로세스: 공유 메모리의 가중치로 배치 평가 후 결과/최고 모델 저장"""
+    from stable_baselines3 import DQN
+
+    torch.set_num_threads(1)  # 학습 프로세스와 코어를 다투지 않도록
+    # 평가만 하므로 리플레이 버퍼는 최소 크기 기본 버퍼로
+    model = DQN.load(io.BytesIO(model_bytes), device="cpu", buffer_size=1,
+                     replay_buffer_class=None, replay_buffer_kwargs={})
+    model.buffer_size, model.replay_buffer_class, model.replay_buffer_kwargs = buffer_settings  # 저장용 원래 설정
+    shm = shared_memory.SharedMemory(name=shm_name)
+    weights = torch.from_numpy(np.ndarray((n_params,), dtype=np.float32, buffer=shm.buf))
+    best_mean_reward = -np.inf
+    timesteps, rewards, lengths, successes = [], [], [], []
+    idle.set()
+
+    while True:
+        step = commands.get()
+        if step is None:
+            break
+        with torch.no_grad():
+            vector_to_parameters(weights.clone(), model.q_net.parameters())
+            model.q_net_target.load_state_dict(model.q_net.state_dict())
+        idle.set()  # 가중치를 복사해 왔으니 학습 쪽이 다음 스냅샷을 써도 됨
+
+        result = evaluate_batched(model, n_episodes, num_envs=num_envs, max_steps=max_steps, seed=seed)
+        summary = summarize(result)
+        is_best = summary["reward_mean"] > best_mean_reward
+        if is_best:
+            best_mean_reward = summary["reward_mean"]
+            if best_model_save_path is not None:
+                model.save(os.path.join(best_model_save_path, "best_model"))
+        if log_path is not None:
+            timesteps.append(step)
+            rewards.append(result["reward"])
+            lengths.append(result["length"])
+            successes.append(result["success"])
+            np.savez(os.path.join(log_path, "evaluations"), timesteps=timesteps, results=rewards,
+                     ep_lengths=lengths, successes=successes)
+        results.put((step, summary, is_best))
+
+    del weights
+    shm.close()
+
+
+class AsyncEvalCallback(BaseCallback):
+    """EvalCallback 대신 별도 프로세스에서 평가하는 콜백
+
+    eval_freq 번 호출마다 Q 네트워크 가중치를 공유 메모리에 복사만 하고 바로 학습을 이어 간다.
+    평가 프로세스는 가중치를 가져가 evaluate_batched 로 n_episodes 를 한 번에 돌리고,
+    결과(로그 기록)와 최고 모델 저장을 비동기로 처리한다.
+    평가가 아직 진행 중이면 다음 스냅샷은 평가 프로세스가 앞 가중치를 가져간 뒤에 보낸다.
+    """
+
+    def __init__(self, eval_freq=10000, n_episodes=100, num_envs=100, max_steps=1000, seed=0,
+                 best_model_save_path=None, log_path=None, verbose=1):
+        super().__init__(verbose)
+        self.eval_freq = eval_freq
+        self.n_episodes = n_episodes
+        self.num_envs = num_envs
+        self.max_steps = max_steps
+        self.seed = seed
+        self.best_model_save_path = best_model_save_path
+        self.log_path = log_path
+        self.best_mean_reward = -np.inf
+        self.last_summary = None
+        self._pending = False
+        self._sent = 0  # 평가 프로세스로 보낸 스냅샷 수
+        self._process = None
+
+    def _init_callback(self):
+        for path in (self.best_model_save_path, self.log_path):
+            if path is not None:
+                os.makedirs(path, exist_ok=True)
+        if self._process is not None:
+            return
+
+        # 평가 프로세스는 시작할 때 한 번 모델 전체를 받고, 이후에는 가중치만 공유 메모리로 받음
+        model_bytes = io.BytesIO()
+        self.model.save(model_bytes)
+        n_params = sum(p.numel() for p in self.model.q_net.parameters())
+        self._shm = shared_memory.SharedMemory(create=True, size=n_params * 4)
+        self._weights = np.ndarray((n_params,), dtype=np.float32, buffer=self._shm.buf)
+
+        ctx = mp.get_context("spawn")
+        self._idle = ctx.Event()
+        self._commands = ctx.Queue()
+        self._results = ctx.Queue()
+        self._process = ctx.Process(
+            target=_eval_worker, daemon=True,
+            args=(model_bytes.getvalue(),
+                  (self.model.buffer_size, self.model.replay_buffer_class, self.model.replay_buffer_kwargs),
+                  self._shm.name, n_params, self.n_episodes, self.num_envs,
+                  self.max_steps, self.seed, self.best_model_save_path, self.log_path,
+                  self._idle, self._commands, self._results))
+        self._process.start()
+
+    def _send(self):
+        with torch.no_grad():
+            self._weights[:] = parameters_to_vector(self.model.q_net.parameters()).cpu().numpy()
+        self._idle.clear()
+        self._commands.put(self.num_timesteps)
+        self._pending = False
+        self._sent += 1
+
+    def _report(self, step, summary, is_best):
+        self.last_summary = summary
+        self.logger.record("eval/mean_reward", summary["reward_mean"])
+        self.logger.record("eval/success_rate", summary["success_rate"])
+        self.logger.record("eval/timesteps", step)
+        if is_best:
+            self.best_mean_reward = summary["reward_mean"]
+        if self.verbose:
+            best = " (새 최고 모델)" if is_best else ""
+            print(f"📈 평가 @{step}: 평균 보상 {summary['reward_mean']:.2f}, "
+                  f"성공률 {summary['success_rate'] * 100:.1f}%{best}")
+
+    def _poll(self, timeout=None):
+        try:
+            result = self._results.get(timeout=timeout) if timeout else self._results.get_nowait()
+        except queue.Empty:
+            return False
+        self._report(*result)
+        return True
+
+    def _on_step(self):
+        while self._poll():
+            pass
+        if self.eval_freq > 0 and self.n_calls % self.eval_freq == 0:
+            self._pending = True
+        if self._pending and self._idle.is_set():
+            self._send()
+        return True
+
+    def _on_training_end(self):
+        """남은 스냅샷까지 평가를 마치고 평가 프로세스 종료
+
+        아직 한 번도 평가하지 않은 짧은 학습이면 마지막 가중치를 평가해 최고 모델을 남긴다.
+        """
+        if self._sent == 0:
+            self._pending = True
+        while self._pending and not self._idle.is_set():  # 앞 스냅샷을 가져갈 때까지
+            if not self._process.is_alive():
+                raise RuntimeError("평가 프로세스가 종료되었습니다")
+            self._poll(timeout=0.1)
+        if self._pending:
+            self._send()
+        self._commands.put(None)
+        while self._process.is_alive():
+            self._poll(timeout=0.1)
+        while self._poll():
+            pass
+        self._process.join()
+        self._process = None
+        self._shm.close()
+        self._shm.unlink()
@@ -0,0 +1,102 @@
+import math
+import multiprocessing as mp
+
+import numpy as np
+
+from Env_Rainforce_Vec import EmotionBalanceVecEnv
+from Game_Random import spawn_seeds
+
+
+def evaluate_batched(model, n_episodes, num_envs=256, max_steps=1000, seed=None, deterministic=True):
+    """N개 게임을 동시에 돌려 n_episodes 개 에피소드 결과를 모음 (스텝당 정책 추론 1회)
+
+    먼저 끝나는 짧은 에피소드만 모이는 편향을 막기 위해 게임 슬롯마다
+    돌릴 에피소드 수를 미리 나눠 두고, 할당량을 채운 슬롯의 결과는 버린다.
+    반환: {"reward": (n,), "length": (n,), "success": (n,)}
+    """
+    num_envs = min(num_envs, n_episodes)
+    quota = np.full(num_envs, n_episodes // num_envs)
+    quota[:n_episodes % num_envs] += 1
+
+    env = EmotionBalanceVecEnv(num_envs=num_envs, max_episode_steps=max_steps, seed=seed)
+    obs = env.reset()
+    done_count = np.zeros(num_envs, dtype=np.int64)
+    rewards, lengths, successes = [], [], []
+
+    while (done_count < quota).any():
+        actions, _ = model.policy.predict(obs, deterministic=deterministic)
+        obs, _, dones, infos = env.step(actions)
+        for i in np.flatnonzero(dones):
+            if done_count[i] < quota[i]:
+                rewards.append(infos[i]["episode"]["r"])
+                lengths.append(infos[i]["episode"]["l"])
+                successes.append(infos[i]["success"])
+            done_count[i] += 1
+
+    env.close()
+    return {
+        "reward": np.array(rewards, dtype=np.float64),
+        "length": np.array(lengths, dtype=np.int64),
+        "success": np.array(successes, dtype=bool),
+    }
+
+
+def _evaluate_worker(args):
+    model_path, n_episodes, num_envs, max_steps, seed = args
+    import torch
+    from stable_baselines3 import DQN
+
+    torch.set_num_threads(1)  # 워커끼리 코어를 나눠 쓰도록
+    model = DQN.load(model_path, device="cpu")
+    return evaluate_batched(model, n_episodes, num_envs=num_envs, max_steps=max_steps, seed=seed)
+
+
+def evaluate_parallel(model_path, n_episodes, num_workers=None, num_envs=256, max_steps=1000, seed=0):
+    """저장된 모델을 워커 프로세스마다 불러 에피소드를 나눠 평가"""
+    num_workers = num_workers or mp.cpu_count()
+    chunks = [n_episodes // num_workers + (w < n_episodes % num_workers) for w in range(num_workers)]
+    seeds = spawn_seeds(seed, num_workers)
+    jobs = [(model_path, n, num_envs, max_steps, s) for n, s in zip(chunks, seeds) if n > 0]
+
+    with mp.get_context("spawn").Pool(len(jobs)) as pool:
+        parts = pool.map(_evaluate_worker, jobs)
+    return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+
+def wilson_interval(successes, n, z=1.96):
+    """성공률의 Wilson 신뢰구간 (기본 95%)"""
+    if n == 0:
+        return 0.0, 0.0
+    p = successes / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return center - half, center + half
+
+
+def summarize(results):
+    reward, length, success = results["reward"], results["length"], results["success"]
+    n = len(reward)
+    low, high = wilson_interval(int(success.sum()), n)
+    goal_steps = length[success]
+    return {
+        "episodes": n,
+        "success_rate": float(success.mean()) if n else 0.0,
+        "success_ci95": (low, high),
+        "reward_mean": float(reward.mean()) if n else 0.0,
+        "reward_sem": float(reward.std(ddof=1) / math.sqrt(n)) if n > 1 else 0.0,
+        "reward_percentiles": {p: float(np.percentile(reward, p)) for p in (5, 25, 50, 75, 95)} if n else {},
+        "steps_to_goal_mean": float(goal_steps.mean()) if len(goal_steps) else None,
+        "steps_to_goal_median": float(np.median(goal_steps)) if len(goal_steps) else None,
+    }
+
+
+def print_summary(summary):
+    low, high = summary["success_ci95"]
+    print(f"✅ 성공률: {summary['success_rate'] * 100:.1f}% "
+          f"(95% CI {low * 100:.1f}~{high * 100:.1f}%, {summary['episodes']} 에피소드)")
+    print(f"🏆 평균 보상: {summary['reward_mean']:.2f} ± {summary['reward_sem']:.2f}")
+    pct = ", ".join(f"p{p}={v:.1f}" for p, v in summary["reward_percentiles"].items())
+    print(f"   보상 분위수: {pct}")
+    if summary["steps_to_goal_mean"] is not None:
+        print(f"⏱️ 골인까지 스텝: 평균 {summary['steps_to_goal_mean']:.1f}, 중앙값 {summary['steps_to_goal_median']:.0f}")
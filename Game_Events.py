@@ -0,0 +1,110 @@
+import json
+import threading
+from collections import Counter, deque, namedtuple
+
+# 게임 이벤트 레코드: kind = "wind" | "success" | "hole" | "fall_off" | "best_score"
+GameEvent = namedtuple("GameEvent", ["kind", "frame", "step", "data"])
+
+
+class EventRing:
+    """크기가 고정된 이벤트 링 버퍼
+
+    게임 루프는 emit() 으로 레코드만 넣고 바로 돌아간다 (I/O 없음).
+    가득 차면 가장 오래된 이벤트부터 밀려나고 dropped 로 개수를 센다.
+    deque 의 append/popleft 는 스레드 안전하므로 다른 스레드에서 drain() 해도 된다.
+    """
+
+    def __init__(self, maxlen=4096):
+        self.maxlen = maxlen
+        self._events = deque(maxlen=maxlen)
+        self.dropped = 0
+
+    def emit(self, kind, frame, step, **data):
+        if len(self._events) == self.maxlen:
+            self.dropped += 1
+        self._events.append(GameEvent(kind, frame, step, data))
+
+    def drain(self):
+        """쌓인 이벤트를 모두 꺼내서 반환"""
+        events = []
+        while True:
+            try:
+                events.append(self._events.popleft())
+            except IndexError:
+                return events
+
+    def __len__(self):
+        return len(self._events)
+
+
+# 게임 코어가 기본으로 쓰는 프로세스 전역 채널
+EVENTS = EventRing()
+
+
+class PrintSink:
+    """이벤트를 콘솔로 출력 (필요할 때만 붙이는 선택 사항)"""
+
+    def __call__(self, event):
+        if event.kind == "wind":
+            direction = '→' if event.data["direction"] > 0 else '←'
+            print(f"🌬️ 바람 갱신 - 방향: {direction}, 세기: {event.data['strength']:.3f}")
+        else:
+            print(f"[{event.kind}] step={event.step} {event.data}")
+
+    def close(self):
+        pass
+
+
+class CounterSink:
+    """종류별 이벤트 개수만 집계"""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def __call__(self, event):
+        self.counts[event.kind] += 1
+
+    def close(self):
+        pass
+
+
+class JsonlFileSink:
+    """이벤트를 JSON Lines 파일로 기록"""
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, event):
+        self.file.write(json.dumps({"kind": event.kind, "frame": event.frame,
+                                    "step": event.step, **event.data}) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class EventDrainer:
+    """백그라운드 스레드가 interval 초마다 링 버퍼를 비워 싱크들에 전달"""
+
+    def __init__(self, ring=EVENTS, sinks=(), interval=1.0):
+        self.ring = ring
+        self.sinks = list(sinks)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        for event in self.ring.drain():
+            for sink in self.sinks:
+                sink(event)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
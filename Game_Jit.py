@@ -0,0 +1,232 @@
+import math
+import numpy as np
+
+# Numba 가 있으면 물리/보상 커널을 컴파일해서 쓰고, 없으면 기존 파이썬 코드 경로를 그대로 쓴다
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# EmotionGameCore(use_jit=None) 의 기본값
+USE_JIT = NUMBA_AVAILABLE
+
+# update_kernel 반환 상태 코드
+RUNNING, FALL_OFF, IN_HOLE, IN_GOAL = 0, 1, 2, 3
+
+# params 배열 인덱스 (EmotionGameCore.jit_params)
+P_BAR_CENTER_X, P_BAR_WIDTH, P_BALL_RADIUS, P_GRAVITY, P_FRICTION = 0, 1, 2, 3, 4
+P_GOAL_LEFT, P_GOAL_RIGHT, P_GOAL_TOP, P_GOAL_BOTTOM, P_HEIGHT, P_GOAL_CENTERX = 5, 6, 7, 8, 9, 10
+P_CELL_SIZE, P_NCOLS, P_NROWS = 11, 12, 13  # 구멍 격자 (Hole_Index.HoleIndex 와 같은 값)
+
+
+@njit(cache=True)
+def hypot(dx, dy):
+    """math.hypot (CPython vector_norm) 과 비트 단위로 같은 스칼라 hypot
+
+    컴파일된 math.hypot 은 C 라이브러리 hypot 이라 마지막 자리가 가끔 달라진다.
+    """
+    ax = abs(dx)
+    ay = abs(dy)
+    m = max(ax, ay)
+    if m == 0.0:
+        return 0.0
+    _, e = math.frexp(m)
+    scale = math.ldexp(1.0, -e)
+
+    csum = 1.0
+    frac1 = 0.0
+    frac2 = 0.0
+    for v in (ax, ay):
+        x = v * scale
+        hi = x * x
+        c = 134217729.0 * x  # Dekker 분할 (2**27 + 1)
+        xh = c - (c - x)
+        xl = x - xh
+        lo = ((xh * xh - hi) + 2.0 * xh * xl) + xl * xl
+        s = csum + hi
+        frac1 += lo
+        frac2 += hi - (s - csum)
+        csum = s
+
+    h = math.sqrt(csum - 1.0 + (frac1 + frac2))
+    hi = h * h
+    c = 134217729.0 * h
+    hh = c - (c - h)
+    hl = h - hh
+    lo = ((hh * hh - hi) + 2.0 * hh * hl) + hl * hl
+    s = csum - hi
+    frac1 -= lo
+    frac2 += -hi - (s - csum)
+    csum = s
+    h += (csum - 1.0 + (frac1 + frac2)) / (2.0 * h)
+    return h / scale
+
+
+@njit(cache=True)
+def _cell_range(x, y, params):
+    """(x, y) 가 속한 칸의 3x3 이웃 칸 범위 (HoleIndex.near 와 같은 칸 계산)"""
+    cs = params[P_CELL_SIZE]
+    ncols = int(params[P_NCOLS])
+    nrows = int(params[P_NROWS])
+    cx = min(max(int(x // cs), 0), ncols - 1)
+    cy = min(max(int(y // cs), 0), nrows - 1)
+    return max(cx - 1, 0), min(cx + 2, ncols), max(cy - 1, 0), min(cy + 2, nrows), ncols
+
+
+@njit(cache=True)
+def hole_kernel(x, y, holes, cell_start, params):
+    """격자 인덱스(HoleIndex.holes / cell_start) 로 이웃 칸 구멍만 검사"""
+    ball_radius = params[P_BALL_RADIUS]
+    x0, x1, y0, y1, ncols = _cell_range(x, y, params)
+    for cy in range(y0, y1):
+        for c in range(cy * ncols + x0, cy * ncols + x1):
+            for i in range(cell_start[c], cell_start[c + 1]):
+                if hypot(x - holes[i, 0], y - holes[i, 1]) < ball_radius:
+                    return True
+    return False
+
+
+@njit(cache=True)
+def update_kernel(ball_x, ball_vx, bar_left_y, bar_right_y, wind_force, holes, cell_start, params):
+    """EmotionGameCore.update 의 바람 계산 이후 부분 (공/막대 물리 + 판정)
+
+    반환: (ball_x, ball_y, ball_vx, bar_left_y, bar_right_y, 상태 코드)
+    """
+    bar_width = params[P_BAR_WIDTH]
+    ball_radius = params[P_BALL_RADIUS]
+
+    slope = (bar_right_y - bar_left_y) / bar_width
+    ball_ax = slope * params[P_GRAVITY]
+    ball_vx += ball_ax + 0.5 * wind_force
+    ball_vx *= params[P_FRICTION]
+    ball_x += ball_vx
+
+    bar_x0 = params[P_BAR_CENTER_X] - bar_width // 2
+    ball_y = bar_left_y + (ball_x - bar_x0) * slope - ball_radius - 5
+
+    bar_left_y += 0.2
+    bar_right_y += 0.2
+    min_y = params[P_GOAL_BOTTOM]
+    max_y = params[P_HEIGHT]
+    bar_left_y = max(min_y, min(bar_left_y, max_y))
+    bar_right_y = max(min_y, min(bar_right_y, max_y))
+
+    if ball_x < bar_x0 or ball_x > bar_x0 + bar_width:
+        status = FALL_OFF
+    elif hole_kernel(ball_x, ball_y, holes, cell_start, params):
+        status = IN_HOLE
+    elif (params[P_GOAL_LEFT] <= ball_x < params[P_GOAL_RIGHT]
+          and params[P_GOAL_TOP] <= ball_y < params[P_GOAL_BOTTOM]):
+        status = IN_GOAL
+    else:
+        status = RUNNING
+    return ball_x, ball_y, ball_vx, bar_left_y, bar_right_y, status
+
+
+@njit(cache=True)
+def reward_kernel(ball_x, ball_y, prev_y, holes, cell_start, hole_y_sorted, wind_strength, params, two):
+    """Reward_Tuned.compute_reward_indexed 의 컴파일 버전
+
+    two 는 항상 2.0 이지만 인자로 받아야 r ** 2 가 x * x 로 바뀌지 않고
+    파이썬과 같은 libm pow 로 계산된다.
+    """
+    ball_radius = params[P_BALL_RADIUS]
+    goal_top = params[P_GOAL_TOP]
+    x_center_score = max(0.0, 1.0 - (abs(ball_x - params[P_GOAL_CENTERX]) / (params[P_BAR_WIDTH] / 2)))
+
+    delta_y = prev_y - ball_y
+    vertical_score = delta_y * 2.0 if delta_y > 0 else delta_y * 0.2
+
+    # 거리는 격자 이웃 칸 구멍만 (더 먼 구멍은 결과에 영향 없음)
+    very_close_danger_zone = ball_radius * 1.1
+    min_hole_dist = 999.0
+    very_close_to_hole = False
+    x0, x1, y0, y1, ncols = _cell_range(ball_x, ball_y, params)
+    for cy in range(y0, y1):
+        for c in range(cy * ncols + x0, cy * ncols + x1):
+            for i in range(cell_start[c], cell_start[c + 1]):
+                hy = holes[i, 1]
+                dist = hypot(ball_x - holes[i, 0], ball_y - hy)
+                if dist < min_hole_dist:
+                    min_hole_dist = dist
+                if dist < very_close_danger_zone and ball_y > hy:
+                    very_close_to_hole = True
+
+    # 통과한 구멍 수는 정렬된 y 에서 이분 탐색
+    pass_reward = 0.0
+    if prev_y > ball_y:
+        passed = np.searchsorted(hole_y_sorted, prev_y) - np.searchsorted(hole_y_sorted, ball_y)
+        pass_reward = 25.0 * passed
+
+    if very_close_to_hole:
+        vertical_reward = 0.2
+    elif x_center_score < 0.5:
+        vertical_reward = 0.0
+    elif min_hole_dist < ball_radius * 2.5 * 2 or wind_strength > 0.04:
+        vertical_reward = 1.0 * vertical_score
+    else:
+        vertical_reward = 1.2 * vertical_score
+
+    penalty_coeff = -150.0
+    bonus = 0.0
+    if delta_y > 0 and ball_y < goal_top + 200:
+        bonus = 15.0
+        penalty_coeff *= 3.0
+    elif delta_y > 0 and ball_y < goal_top + 500:
+        bonus = 5.0
+        penalty_coeff *= 2.0
+
+    hole_penalty = 0.0
+    safe_dist = ball_radius * 2.0
+    if min_hole_dist < safe_dist:
+        ratio = (safe_dist - min_hole_dist) / safe_dist
+        hole_penalty = penalty_coeff * (ratio ** two)
+
+    x_goal_bonus = 2.0 * x_center_score if ball_y <= goal_top + 30 else 0.0
+
+    return 2.5 * x_center_score + vertical_reward + hole_penalty + pass_reward - 0.02 + bonus + x_goal_bonus
+
+
+def validate(n_steps=2_000_000, seed=0):
+    """컴파일 경로 환경과 파이썬 경로 환경을 같은 시드/액션으로 나란히 돌려 비교
+
+    관측/보상/종료가 하나라도 다르면 그 스텝 수를 센다. 반환: 불일치 스텝 수
+    """
+    from Env_Rainforce_Tuned import EmotionBalanceEnv
+
+    fast = EmotionBalanceEnv(enabled=False, use_jit=True)
+    reference = EmotionBalanceEnv(enabled=False, use_jit=False)
+    fast.reset(seed=seed)
+    reference.reset(seed=seed)
+    actions = np.random.default_rng(seed).integers(0, 3, 1 << 16).tolist()
+
+    mismatches = 0
+    for i in range(n_steps):
+        action = actions[i & 0xFFFF]
+        obs_f, reward_f, done_f, _, _ = fast.step(action)
+        obs_r, reward_r, done_r, _, _ = reference.step(action)
+        f, r = fast.game, reference.game
+        if (reward_f != reward_r or done_f != done_r or not np.array_equal(obs_f, obs_r)
+                or f.ball_x != r.ball_x or f.ball_y != r.ball_y or f.ball_vx != r.ball_vx
+                or f.bar_left_y != r.bar_left_y or f.bar_right_y != r.bar_right_y or f.success != r.success):
+            mismatches += 1
+        if done_r or fast.game.current_steps >= 1000:
+            fast.reset()
+            reference.reset()
+    return mismatches
+
+
+if __name__ == "__main__":
+    import time
+
+    print(f"Numba 사용 가능: {NUMBA_AVAILABLE}")
+    start = time.perf_counter()
+    n = 2_000_000
+    bad = validate(n)
+    print(f"JIT 검증: {n}스텝 중 불일치 {bad}개 ({time.perf_counter() - start:.1f}초)")
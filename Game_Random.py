@@ -0,0 +1,56 @@
+import numpy as np
+
+# 바람 잡음용 균등난수를 한 번에 뽑아 두는 개수 (스텝마다 Generator 를 부르지 않도록)
+NOISE_BLOCK = 1024
+
+
+def make_rng(seed=None):
+    """게임 인스턴스 전용 카운터 기반(Philox) 난수 생성기
+
+    seed 는 정수, SeedSequence 또는 None(OS 엔트로피) 을 받는다.
+    전역 random 을 공유하지 않으므로 병렬 게임끼리 서로 영향을 주지 않는다.
+    """
+    return np.random.Generator(np.random.Philox(seed))
+
+
+def spawn_seeds(seed, n):
+    """하나의 시드에서 서로 독립인 정수 시드 n개를 파생 (워커/게임별 분배용)"""
+    return [int(s.generate_state(1, np.uint64)[0] >> 1)
+            for s in np.random.SeedSequence(seed).spawn(n)]
+
+
+# Philox 생성기 상태를 고정 크기 레코드로 담는 dtype (스냅샷용)
+RNG_STATE_DTYPE = np.dtype([
+    ("counter", np.uint64, (4,)),
+    ("key", np.uint64, (2,)),
+    ("buffer", np.uint64, (4,)),
+    ("buffer_pos", np.int64),
+    ("has_uint32", np.int64),
+    ("uinteger", np.uint64),
+])
+
+
+def pack_rng_state(rng, out):
+    """rng 의 현재 상태를 RNG_STATE_DTYPE 레코드 out 에 기록"""
+    state = rng.bit_generator.state
+    out["counter"] = state["state"]["counter"]
+    out["key"] = state["state"]["key"]
+    out["buffer"] = state["buffer"]
+    out["buffer_pos"] = state["buffer_pos"]
+    out["has_uint32"] = state["has_uint32"]
+    out["uinteger"] = state["uinteger"]
+
+
+def unpack_rng_state(record, rng=None):
+    """RNG_STATE_DTYPE 레코드의 상태를 rng 에 덮어씀 (None 이면 새 Philox Generator 생성)"""
+    if rng is None:
+        rng = np.random.Generator(np.random.Philox(key=record["key"]))  # 키를 직접 주면 시드 해싱 생략
+    rng.bit_generator.state = {
+        "bit_generator": "Philox",
+        "state": {"counter": np.array(record["counter"]), "key": np.array(record["key"])},
+        "buffer": np.array(record["buffer"]),
+        "buffer_pos": int(record["buffer_pos"]),
+        "has_uint32": int(record["has_uint32"]),
+        "uinteger": int(record["uinteger"]),
+    }
+    return rng
@@ -0,0 +1,38 @@
+from functools import lru_cache
+
+import numpy as np
+
+from Game_Random import RNG_STATE_DTYPE
+
+
+@lru_cache(maxsize=None)
+def state_dtype(num_holes=8):
+    """게임 1개의 전체 상태를 담는 고정 크기 레코드 dtype
+
+    단일 게임(EmotionGameCore.snapshot) 과 배치(VectorEmotionGameCore.snapshot)
+    가 같은 dtype 을 쓰므로 배치의 한 줄을 단일 게임에 그대로 복원할 수 있다.
+    바람 잡음 블록은 통째로 담지 않고, 블록을 뽑기 직전의 난수 상태(noise_rng)와
+    읽은 위치만 담아 복원할 때 다시 뽑는다.
+    """
+    return np.dtype([
+        ("ball_x", np.float64),
+        ("ball_y", np.float64),
+        ("ball_vx", np.float64),
+        ("bar_left_y", np.float64),
+        ("bar_right_y", np.float64),
+        ("wind_strength", np.float64),
+        ("wind_direction", np.int64),
+        ("wind_variation", np.float64),
+        ("frame_count", np.int64),
+        ("current_steps", np.int64),
+        ("game_over", np.bool_),
+        ("success", np.bool_),
+        ("hole_count", np.int64),
+        ("holes", np.float64, (num_holes, 2)),
+        ("level", np.int64),  # 레벨 뱅크 번호 (-1 이면 난수 생성 레벨)
+        ("wind_idx", np.int64),  # 레벨 바람 일정에서 다음에 쓸 위치
+        ("rng", RNG_STATE_DTYPE),
+        ("noise_rng", RNG_STATE_DTYPE),
+        ("noise_len", np.int64),  # 0 이면 뽑아 둔 잡음 블록 없음
+        ("noise_pos", np.int64),
+    ])
@@ -0,0 +1,189 @@
+import math
+from bisect import bisect_left
+from functools import cached_property
+
+import numpy as np
+
+from Hole_Layout import PAD_HOLE
+
+
+def hole_cell_size(ball_radius, hole_radius=None):
+    """격자 한 칸 크기 = 판정/보상이 구멍을 보는 가장 먼 거리
+
+    빠짐 판정은 공 중심이 구멍 중심에서 hole_radius (기본: 공 반지름) 안일 때,
+    보상은 danger_zone * 2 = ball_radius * 5 까지 본다. 그보다 먼 구멍은 결과에
+    영향이 없으므로 칸 크기를 이 거리로 두면 3x3 이웃 칸만 보면 된다.
+    """
+    hole_radius = ball_radius if hole_radius is None else hole_radius
+    return float(max(hole_radius, ball_radius * 2.5 * 2))
+
+
+# 기본 공 반지름(18) 기준 칸 크기 (게임은 자기 반지름으로 hole_cell_size 를 다시 계산)
+HOLE_CELL_SIZE = hole_cell_size(18)
+
+# 구멍이 이보다 적으면 격자 없이 전체를 훑는 편이 더 빠르다
+INDEX_MIN_HOLES = 32
+
+
+class HoleIndex:
+    """게임 1개의 구멍 균등 격자 인덱스 (reset 때 한 번 생성)
+
+    칸마다 자기 + 이웃 8칸의 구멍 목록을 미리 합쳐 두어, 조회는
+    칸 번호 계산 한 번 + 목록 순회로 끝난다. 구멍 수가 늘어도
+    밀도가 같으면 조회 비용은 거의 일정하다.
+    격자는 처음 조회할 때 만들고, 구멍이 INDEX_MIN_HOLES 보다 적으면 만들지 않는다.
+    """
+
+    def __init__(self, holes, cell_size=HOLE_CELL_SIZE, width=1200, height=1000):
+        if not isinstance(holes, list):
+            holes = np.asarray(holes, dtype=np.float64).reshape(-1, 2).tolist()
+        self.cell_size = float(cell_size)
+        self.ncols = int(width // cell_size) + 1
+        self.nrows = int(height // cell_size) + 1
+        self._holes = holes
+        self._ys = sorted(hy for _, hy in holes)
+        self._linear = len(holes) < INDEX_MIN_HOLES
+
+    def _cell(self, x, y):
+        cx = min(max(int(x // self.cell_size), 0), self.ncols - 1)
+        cy = min(max(int(y // self.cell_size), 0), self.nrows - 1)
+        return cy, cx
+
+    @cached_property
+    def _near(self):
+        """칸 -> 3x3 이웃 구멍 목록 (구멍이 있는 칸만)"""
+        near = {}
+        for hx, hy in self._holes:
+            cy, cx = self._cell(hx, hy)
+            for ny in range(max(cy - 1, 0), min(cy + 2, self.nrows)):
+                for nx in range(max(cx - 1, 0), min(cx + 2, self.ncols)):
+                    near.setdefault(ny * self.ncols + nx, []).append((hx, hy))
+        return near
+
+    @cached_property
+    def _csr(self):
+        """JIT 커널용: 칸 순으로 정렬된 구멍 (H, 2) + 칸별 시작 위치"""
+        cell = np.array([cy * self.ncols + cx for cy, cx in (self._cell(hx, hy) for hx, hy in self._holes)],
+                        dtype=np.int64)
+        order = np.argsort(cell, kind="stable")
+        holes = np.array(self._holes, dtype=np.float64).reshape(-1, 2)[order]
+        return holes, np.searchsorted(cell[order], np.arange(self.ncols * self.nrows + 1))
+
+    @cached_property
+    def holes(self):
+        return self._csr[0]
+
+    @cached_property
+    def cell_start(self):
+        return self._csr[1]
+
+    @cached_property
+    def hole_y_sorted(self):
+        return np.array(self._ys, dtype=np.float64)
+
+    def near(self, x, y):
+        """(x, y) 에서 cell_size 안에 있을 수 있는 구멍 후보 목록"""
+        if self._linear:
+            return self._holes
+        cy, cx = self._cell(x, y)
+        return self._near.get(cy * self.ncols + cx, ())
+
+    def any_within(self, x, y, r):
+        """거리 r(<= cell_size) 안에 구멍이 있는지"""
+        return any(math.hypot(x - hx, y - hy) < r for hx, hy in self.near(x, y))
+
+    def count_passed(self, ball_y, prev_y):
+        """prev_y > hy >= ball_y 인 (이번 스텝에 위로 지나친) 구멍 수"""
+        if prev_y <= ball_y:
+            return 0
+        return bisect_left(self._ys, prev_y) - bisect_left(self._ys, ball_y)
+
+
+class BatchHoleIndex:
+    """N개 게임의 구멍 격자 인덱스
+
+    near[n, 칸] 에 게임 n 의 3x3 이웃 구멍 번호 K개를 채워 두고 (빈 자리는 H: inf 좌표 줄),
+    게임별 공 위치의 칸을 한 번에 모아 (N, K, 2) 후보 좌표만 계산한다.
+    리셋된 게임 줄만 다시 채운다.
+    메모리는 near 가 N * 칸 수 * K * 2 바이트 (구멍 번호 int16) 이고, K 는 실제 구멍 배치에서
+    3x3 이웃에 모인 최대 구멍 수라 구멍 수 H 를 넘지 않는다. 기본 보드 (칸 14 x 12) 에서
+    N = 1024, K = 32 여도 약 11MB 이다. K 는 더 촘촘한 배치가 오면 늘어나고 줄지는 않는다.
+    """
+
+    def __init__(self, num_games, cell_size=HOLE_CELL_SIZE, width=1200, height=1000):
+        self.num_games = num_games
+        self.cell_size = float(cell_size)
+        self.ncols = int(width // cell_size) + 1
+        self.nrows = int(height // cell_size) + 1
+        self.holes = np.full((num_games, 1, 2), np.inf)  # 게임별 구멍 좌표 + 마지막 줄 inf (빈 자리)
+        self.near = np.zeros((num_games, self.ncols * self.nrows, 1), dtype=np.int16)
+        self.hole_y_sorted = np.zeros((num_games, 0))
+        self._rows = np.arange(num_games)
+
+    def _cells(self, x, y):
+        cx = np.clip(np.floor_divide(x, self.cell_size), 0, self.ncols - 1).astype(np.int64)
+        cy = np.clip(np.floor_divide(y, self.cell_size), 0, self.nrows - 1).astype(np.int64)
+        return cy, cx
+
+    def build(self, holes, idx=None):
+        """holes: (N, H, 2) 전체 배열, idx 줄만 다시 색인 (None 이면 전체)"""
+        idx = self._rows if idx is None else np.asarray(idx)
+        if len(idx) == 0:
+            return
+        n_holes = holes.shape[1]
+        if self.hole_y_sorted.shape[1] != n_holes:
+            self.hole_y_sorted = np.zeros((self.num_games, n_holes))
+            self.holes = np.full((self.num_games, n_holes + 1, 2), np.inf)
+            self.near = np.full(self.near.shape, n_holes, dtype=np.int16)
+        self.hole_y_sorted[idx] = np.sort(holes[idx, :, 1], axis=1)
+        self.holes[idx, :n_holes] = holes[idx]
+
+        # 구멍마다 3x3 이웃 칸 (보드 밖 칸은 제외)
+        sub = holes[idx]
+        cy, cx = self._cells(sub[:, :, 0], sub[:, :, 1])
+        d = np.array([-1, 0, 1])
+        ny = (cy[:, :, None, None] + d[:, None]).repeat(3, axis=3)
+        nx = (cx[:, :, None, None] + d[None, :]).repeat(3, axis=2)
+        valid = (ny >= 0) & (ny < self.nrows) & (nx >= 0) & (nx < self.ncols)
+        valid &= (sub[:, :, 0] != PAD_HOLE)[:, :, None, None]  # 빈 구멍 자리는 색인하지 않음
+        row = np.broadcast_to(np.arange(len(idx))[:, None, None, None], valid.shape)[valid]
+        hole = np.broadcast_to(np.arange(sub.shape[1])[None, :, None, None], valid.shape)[valid]
+        cell = (ny * self.ncols + nx)[valid]
+
+        # (줄, 칸) 별 순번 -> 채울 자리
+        key = row * (self.ncols * self.nrows) + cell
+        order = np.argsort(key, kind="stable")
+        key, row, hole, cell = key[order], row[order], hole[order], cell[order]
+        first = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        rank = np.arange(len(key)) - np.repeat(first, np.diff(np.r_[first, len(key)]))
+
+        k = int(rank.max()) + 1 if len(rank) else 1
+        if k > self.near.shape[2]:
+            grown = np.full(self.near.shape[:2] + (k,), n_holes, dtype=np.int16)
+            grown[:, :, :self.near.shape[2]] = self.near
+            self.near = grown
+        self.near[idx] = n_holes
+        self.near[idx[row], cell, rank] = hole
+
+    def gather(self, x, y):
+        """게임별 공 위치 칸의 구멍 후보 (N, K, 2), 빈 자리는 inf"""
+        cy, cx = self._cells(x, y)
+        near = self.near[self._rows, cy * self.ncols + cx]
+        return self.holes[self._rows[:, None], near]
+
+    def count_passed(self, ball_y, prev_y):
+        """게임별 prev_y > hy >= ball_y 인 구멍 수 (줄마다 이분 탐색을 배열로 동시에)"""
+        return np.maximum(self._count_below(prev_y) - self._count_below(ball_y), 0)
+
+    def _count_below(self, v):
+        ys = self.hole_y_sorted
+        n = ys.shape[1]
+        lo = np.zeros(self.num_games, dtype=np.int64)
+        hi = np.full(self.num_games, n, dtype=np.int64)
+        for _ in range(n.bit_length()):
+            active = lo < hi
+            mid = (lo + hi) // 2
+            go = ys[self._rows, np.minimum(mid, n - 1)] < v
+            lo = np.where(active & go, mid + 1, lo)
+            hi = np.where(active & ~go, mid, hi)
+        return lo
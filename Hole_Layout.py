@@ -0,0 +1,64 @@
+import numpy as np
+
+# 기존 Tuned 구멍 8개 기본 위치 (x 는 0~100 랜덤 지터) - num_holes == 8 이면 그대로 사용
+CLASSIC_HOLES = np.array([
+    (600, 200),
+    (500, 450),
+    (350, 600),
+    (300, 480),
+    (730, 550),
+    (650, 700),
+    (500, 800),
+    (400, 350)
+], dtype=np.float64)
+CLASSIC_JITTER = 100
+
+# 고정 크기 배열에서 빈 구멍 자리 (보드 밖이라 판정/보상에 영향 없음)
+PAD_HOLE = -1000.0
+
+
+def grid_shape(num_holes, width, height, min_dist):
+    """영역을 num_holes 칸 이상으로 나누는 (열, 행, 칸 너비, 칸 높이)
+
+    칸 안쪽 min_dist / 2 여백 안에만 구멍을 두므로 칸이 min_dist 보다 커야 한다.
+    """
+    side = np.sqrt(width * height / num_holes)
+    while True:
+        ncols, nrows = max(int(width // side), 1), max(int(height // side), 1)
+        if ncols * nrows >= num_holes:
+            break
+        side *= 0.95
+    cell_w, cell_h = width / ncols, height / nrows
+    if min(cell_w, cell_h) <= min_dist:
+        raise ValueError(f"구멍 {num_holes}개를 간격 {min_dist} 로 {width}x{height} 영역에 배치할 수 없습니다")
+    return ncols, nrows, cell_w, cell_h
+
+
+def generate_layouts(rng, num_games, num_holes, region=(375, 200, 825, 800), ball_radius=18, margin=20):
+    """게임 num_games 개의 구멍 배치를 한 번에 생성 -> (num_games, num_holes, 2)
+
+    격자 지터 방식: region(x0, y0, x1, y1) 을 num_holes 칸 이상으로 나누고
+    게임마다 칸 num_holes 개를 무작위로 골라 칸 안쪽 여백 안에 하나씩 둔다.
+    이웃 칸 구멍끼리도 2 * ball_radius + margin 이상 떨어지므로 겹침 검사가 필요 없다.
+    num_holes == 8 이면 기존 Tuned 배치(기본 위치 + x 지터)를 그대로 쓴다.
+    """
+    if num_holes == len(CLASSIC_HOLES):
+        holes = np.broadcast_to(CLASSIC_HOLES, (num_games, num_holes, 2)).copy()
+        holes[:, :, 0] += rng.integers(0, CLASSIC_JITTER + 1, (num_games, num_holes))
+        return holes
+    if num_holes == 0:
+        return np.zeros((num_games, 0, 2))
+
+    x0, y0, x1, y1 = region
+    min_dist = 2 * ball_radius + margin
+    ncols, nrows, cell_w, cell_h = grid_shape(num_holes, x1 - x0, y1 - y0, min_dist)
+
+    # 게임마다 서로 다른 칸 num_holes 개 (난수 키가 가장 작은 칸들)
+    keys = rng.random((num_games, ncols * nrows))
+    cells = np.argpartition(keys, num_holes - 1, axis=1)[:, :num_holes]
+    u = rng.random((num_games, num_holes, 2))
+
+    holes = np.empty((num_games, num_holes, 2))
+    holes[:, :, 0] = x0 + (cells % ncols) * cell_w + min_dist / 2 + u[:, :, 0] * (cell_w - min_dist)
+    holes[:, :, 1] = y0 + (cells // ncols) * cell_h + min_dist / 2 + u[:, :, 1] * (cell_h - min_dist)
+    return holes
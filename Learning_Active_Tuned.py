@@ -1,20 +1,23 @@
 import torch
 import time
+from functools import partial
 import numpy as np
 from sklearn.metrics import confusion_matrix, ConfusionMatrixDisplay
 import matplotlib.pyplot as plt
 
 from stable_baselines3 import DQN
-from stable_baselines3.common.callbacks import EvalCallback, BaseCallback
-from stable_baselines3.common.monitor import Monitor
-from gymnasium.wrappers import TimeLimit
+from stable_baselines3.common.callbacks import BaseCallback
 
 from Env_Rainforce_Tuned import EmotionBalanceEnv
-
-if torch.cuda.is_available():
-    print(f"✅ GPU 사용 중: {torch.cuda.get_device_name(0)}")
-else:
-    print("⚠️ GPU 사용 불가 — 현재 CPU 모드로 실행됩니다.")
+from Env_Rainforce_Vec import EmotionBalanceVecEnv
+from Env_Rainforce_Parallel import SharedMemoryVecEnv
+from Profiler_Callback import ProfilerCallback
+from Evaluation import evaluate_batched, evaluate_parallel, summarize, print_summary
+from Replay_Buffer import StaticContextReplayBuffer, MemmapReplayBuffer
+from Checkpoint import AsyncCheckpointCallback, latest_checkpoint, resume
+from Eval_Callback import AsyncEvalCallback
+from Video_Recorder import VideoRecorder, RecordEpisodes, FirstSuccess, AllFailures, EveryNth
+from Trajectory_Store import TrajectoryWriter, LogTrajectories
 
 class PrintStepCallback(BaseCallback):
     def _on_step(self):
@@ -22,120 +25,181 @@ class PrintStepCallback(BaseCallback):
             print(f"🔄 Step {self.n_calls} 진행 중...")
         return True
 
-MODE = input("Enter the mode (train or play) : ").lower()
-
-
-if MODE == "train":
-    env = Monitor(TimeLimit(EmotionBalanceEnv(enabled=False), max_episode_steps=1000))
-    eval_env = Monitor(TimeLimit(EmotionBalanceEnv(enabled=False), max_episode_steps=1000))
-
-    eval_callback = EvalCallback(
-        eval_env,
-        best_model_save_path="./best_model/",
-        log_path="./logs/",
-        eval_freq=10000,
-        deterministic=True,
-        render=False
-    )
-
-    model = DQN(
-        policy="MlpPolicy",
-        env=env,
-        learning_rate=1e-3,
-        buffer_size=100000,
-        learning_starts=1000,
-        batch_size=256,
-        gamma=0.99,
-        train_freq=4,
-        target_update_interval=500,
-        exploration_initial_eps=1.0,
-        exploration_final_eps=0.3,
-        exploration_fraction=0.7,
-        policy_kwargs={
-            # Fully-connected 레이어를 3~4개로 늘리고, 폭도 크게
-            "net_arch": [512, 512, 256, 128],
-            "activation_fn": torch.nn.ReLU,
-        },
-        verbose=1,
-        tensorboard_log="./dqn_tensorboard",
-        device="cuda" if torch.cuda.is_available() else "cpu"
-    )
-
-    start_time = time.time()
-    model.learn(total_timesteps=1_000_000, callback=[eval_callback, PrintStepCallback()])
-    end_time = time.time()
-
-    print(f"⏱️ 학습 소요 시간: {end_time - start_time:.2f}초")
-
-    model_path = "./best_model/best_model.zip"
-    model = DQN.load(model_path, device="cuda" if torch.cuda.is_available() else "cpu")
-
-    print("🚀 저장된 Best Model 평가 시작...")
-    print(f"불러온 모델 경로: {model_path}")
-    n_episodes = 30
-    success_count = 0
-    rewards = []
-
-    for episode in range(n_episodes):
-        play_env = EmotionBalanceEnv(enabled=False)
-        obs, _ = play_env.reset()
-        done = False
-        episode_reward = 0
-        step_count = 0
-        max_steps = 1000
-
-        while not done and step_count < max_steps:
-            action, _ = model.predict(obs, deterministic=True)
-            obs, reward, done, _, info = play_env.step(action)
-            #play_env.render()
-            episode_reward += reward
-            step_count += 1
-
-        success = info.get("success", False)
-        if success:
-            success_count += 1
-        rewards.append(episode_reward)
-        print(f"🎮 Episode {episode + 1}: Reward={episode_reward:.2f}, Success={success}")
-
-    print("\n📊 Best Model 평가 결과")
-    if rewards:
-        print(f"✅ 성공률: {success_count}/{n_episodes} ({(success_count / n_episodes) * 100:.1f}%)")
-        print(f"🏆 평균 보상: {np.mean(rewards):.2f}")
+# 워커 프로세스(spawn)가 이 파일을 다시 import 해도 학습이 시작되지 않도록 보호
+if __name__ == "__main__":
+    if torch.cuda.is_available():
+        print(f"✅ GPU 사용 중: {torch.cuda.get_device_name(0)}")
     else:
-        print("⚠️ 평균 보상 계산 실패: 보상이 기록되지 않았습니다.")
-
-
-elif MODE == "play":
-    model_path = "./best_model/best_model.zip"
-    model = DQN.load(model_path, device="cuda" if torch.cuda.is_available() else "cpu")
-
-    n_episodes = 10
-    success_count = 0
-    rewards = []
-
-    for episode in range(n_episodes):
+        print("⚠️ GPU 사용 불가 — 현재 CPU 모드로 실행됩니다.")
+
+    MODE = input("Enter the mode (train, resume, play or record) : ").lower()
+    # 동시에 진행할 게임 수. 1코어 측정 (steps/s): 원래 경로 Monitor(TimeLimit(env)) 1개 ~41k,
+    # 벡터 환경 16개 ~44k / 64개 ~134k / 256개 ~342k / 512개 ~486k / 1024개 ~643k
+    # → 64개 안팎부터 단일 환경보다 빠르고, 10배 이상은 512개부터
+    N_ENVS = 512
+    N_WORKERS = 1  # 2 이상이면 워커 프로세스에 게임을 나눠 공유 메모리로 수집
+    PROFILE = False  # True 면 구간별 시간표 출력 + profile.folded (플레임그래프용) 저장
+    EVAL_EPISODES = 1000  # 학습 후 Best Model 평가 에피소드 수
+    REPLAY_PATH = None  # 디렉터리를 주면 리플레이 버퍼를 파일 매핑으로 두고 재시작 때 이어 씀
+    CHECKPOINT_DIR = "./checkpoints/"  # resume 모드는 여기서 마지막 체크포인트를 불러옴
+    CHECKPOINT_FREQ = 50000  # 체크포인트 간격 (스텝)
+    TOTAL_TIMESTEPS = 1_000_000
+    PLAY_SPEED = 1.0  # play 모드 배속 (↑/↓ 키로 조절)
+    PLAY_TURBO = False  # True 면 속도 제한 없이 진행 (SPACE 키로 전환)
+    PLAY_RENDER_EVERY = 0  # 터보에서 N 스텝마다 그림 (0 이면 60 FPS 기준)
+    RECORD_DIR = "./videos/"  # record 모드: 창 없이 평가하며 골라낸 에피소드를 파일로 저장
+    RECORD_EPISODES = 100
+    RECORD_EXT = ".gif"  # .mp4 등은 imageio[ffmpeg] 필요
+    RECORD_FRAME_SKIP = 2  # N 스텝마다 한 프레임 (60 / N fps)
+    RECORD_SIZE = (600, 500)  # 프레임 크기 (너비, 높이), None 이면 원본
+    TRAJECTORY_DIR = "./trajectories/"  # record 모드: 모든 에피소드의 행동/상태 기록 (None 이면 끔)
+
+
+    if MODE in ("train", "resume"):
+        # Monitor/TimeLimit 없이 N개 게임을 한 번에 진행 (에피소드 통계/1000스텝 제한 내장)
+        if N_WORKERS > 1:
+            # 워커는 관측을 바로 공유 메모리로 복사하므로 버퍼 view 를 그대로 넘겨도 안전
+            env = SharedMemoryVecEnv(partial(EmotionBalanceVecEnv, obs_view=True),
+                                     num_envs=N_ENVS, num_workers=N_WORKERS)
+        else:
+            env = EmotionBalanceVecEnv(num_envs=N_ENVS, max_episode_steps=1000)
+
+        try:
+            # 평가는 별도 프로세스에서 (가중치는 공유 메모리로 전달, 학습 루프는 멈추지 않음)
+            eval_callback = AsyncEvalCallback(
+                eval_freq=max(10000 // N_ENVS, 1),  # 콜백 호출 1회당 N_ENVS 스텝
+                n_episodes=100,
+                best_model_save_path="./best_model/",
+                log_path="./logs/",
+            )
+
+            if MODE == "resume" and latest_checkpoint(CHECKPOINT_DIR) is None:
+                print("⚠️ 체크포인트가 없어 처음부터 학습합니다.")
+                MODE = "train"
+            if MODE == "resume":
+                # 정책/옵티마이저/탐험 진행/난수/게임 상태/리플레이 버퍼 위치를 복원해 중단 지점부터 이어서 학습
+                model = resume(CHECKPOINT_DIR, env, device="cuda" if torch.cuda.is_available() else "cpu")
+                print(f"🔁 {latest_checkpoint(CHECKPOINT_DIR)} 에서 재개 ({model.num_timesteps} 스텝)")
+            else:
+                model = DQN(
+                    policy="MlpPolicy",
+                    env=env,
+                    learning_rate=1e-3,
+                    buffer_size=100000,
+                    # 구멍 좌표는 에피소드당 한 번만 저장
+                    replay_buffer_class=MemmapReplayBuffer if REPLAY_PATH else StaticContextReplayBuffer,
+                    replay_buffer_kwargs={"path": REPLAY_PATH} if REPLAY_PATH else None,
+                    learning_starts=1000,
+                    batch_size=256,
+                    gamma=0.99,
+                    # SB3 의 train_freq 는 VecEnv 스텝 (= N_ENVS 전환) 단위이므로
+                    # 매 스텝 N_ENVS // 4 번 업데이트해 원래 비율 (전환 4개당 1번) 을 유지
+                    train_freq=1,
+                    gradient_steps=max(N_ENVS // 4, 1),
+                    target_update_interval=500,
+                    exploration_initial_eps=1.0,
+                    exploration_final_eps=0.3,
+                    exploration_fraction=0.7,
+                    policy_kwargs={
+                        # Fully-connected 레이어를 3~4개로 늘리고, 폭도 크게
+                        "net_arch": [512, 512, 256, 128],
+                        "activation_fn": torch.nn.ReLU,
+                    },
+                    verbose=1,
+                    tensorboard_log="./dqn_tensorboard",
+                    device="cuda" if torch.cuda.is_available() else "cpu"
+                )
+
+            start_time = time.time()
+            callbacks = [eval_callback, PrintStepCallback()]
+            if PROFILE:
+                callbacks.append(ProfilerCallback(report_freq=10000, timed_callbacks=[eval_callback]))
+            callbacks.append(AsyncCheckpointCallback(CHECKPOINT_FREQ, CHECKPOINT_DIR))
+            model.learn(total_timesteps=TOTAL_TIMESTEPS - model.num_timesteps, callback=callbacks,
+                        reset_num_timesteps=MODE == "train")
+            end_time = time.time()
+
+            print(f"⏱️ 학습 소요 시간: {end_time - start_time:.2f}초")
+
+            model_path = "./best_model/best_model.zip"
+            print("🚀 저장된 Best Model 평가 시작...")
+            print(f"불러온 모델 경로: {model_path}")
+            # 게임 수백 개를 동시에 돌리고 스텝마다 정책을 배치로 한 번만 호출
+            if N_WORKERS > 1:
+                results = evaluate_parallel(model_path, n_episodes=EVAL_EPISODES, num_workers=N_WORKERS)
+            else:
+                model = DQN.load(model_path, device="cuda" if torch.cuda.is_available() else "cpu")
+                results = evaluate_batched(model, n_episodes=EVAL_EPISODES, seed=0)
+
+            print("\n📊 Best Model 평가 결과")
+            print_summary(summarize(results))
+        finally:
+            env.close()
+
+
+    elif MODE == "play":
+        model_path = "./best_model/best_model.zip"
+        model = DQN.load(model_path, device="cuda" if torch.cuda.is_available() else "cpu")
+
+        n_episodes = 10
+        success_count = 0
+        rewards = []
+
+        # 창/재생 속도 설정이 에피소드 사이에 유지되도록 환경은 하나만 만듦
         play_env = EmotionBalanceEnv(enabled=True)
-        obs, _ = play_env.reset()
-        done = False
-        step_count = 0
-        max_steps = 1000
-        episode_reward = 0
-
-        while not done and step_count < max_steps:
-            action, _ = model.predict(obs, deterministic=True)
-            obs, reward, done, _, info = play_env.step(action)
-            play_env.render()
-            episode_reward += reward
-            step_count += 1
-
-        success = info.get("success", False)
-        if success:
-            success_count += 1
-        rewards.append(episode_reward)
-        print(f"🎮 Episode {episode + 1}: Reward={episode_reward:.2f}, Success={success}")
-
-    print(f"✅ 테스트 완료: 성공률 {success_count}/{n_episodes} ({(success_count / n_episodes) * 100:.1f}%)")
-    print(f"평균 보상: {np.mean(rewards):.2f}")
-
-else:
-    print("⚠️ MODE를 잘못 입력하셨습니다. 'train' 또는 'play'로 입력해주세요.")
+        play_env.game.render_options = {"speed": PLAY_SPEED, "turbo": PLAY_TURBO,
+                                        "render_every": PLAY_RENDER_EVERY}
+        for episode in range(n_episodes):
+            obs, _ = play_env.reset()
+            done = False
+            step_count = 0
+            max_steps = 1000
+            episode_reward = 0
+
+            while not done and step_count < max_steps:
+                action, _ = model.predict(obs, deterministic=True)
+                obs, reward, done, _, info = play_env.step(action)
+                play_env.render()
+                episode_reward += reward
+                step_count += 1
+
+            success = info.get("success", False)
+            if success:
+                success_count += 1
+            rewards.append(episode_reward)
+            print(f"🎮 Episode {episode + 1}: Reward={episode_reward:.2f}, Success={success}")
+
+        print(f"✅ 테스트 완료: 성공률 {success_count}/{n_episodes} ({(success_count / n_episodes) * 100:.1f}%)")
+        print(f"평균 보상: {np.mean(rewards):.2f}")
+
+    elif MODE == "record":
+        model_path = "./best_model/best_model.zip"
+        model = DQN.load(model_path, device="cuda" if torch.cuda.is_available() else "cpu")
+
+        # 첫 성공 + 모든 실패 + 10번째마다 녹화, 인코딩은 백그라운드 스레드에서
+        recorder = VideoRecorder(RECORD_DIR, rules=[FirstSuccess(), AllFailures(), EveryNth(10)],
+                                 fps=60 / RECORD_FRAME_SKIP, ext=RECORD_EXT)
+        record_env = EmotionBalanceEnv(render_mode="rgb_array", frame_size=RECORD_SIZE)
+        if TRAJECTORY_DIR:
+            # python Trajectory_Store.py ./trajectories/ --play N 으로 정책 없이 다시 볼 수 있음
+            record_env = LogTrajectories(record_env, TrajectoryWriter(TRAJECTORY_DIR))
+        record_env = RecordEpisodes(record_env, recorder, frame_skip=RECORD_FRAME_SKIP)
+        success_count = 0
+        for episode in range(RECORD_EPISODES):
+            obs, _ = record_env.reset()
+            done = False
+            step_count = 0
+            while not done and step_count < 1000:
+                action, _ = model.predict(obs, deterministic=True)
+                obs, _, done, _, info = record_env.step(action)
+                step_count += 1
+            if not done:
+                recorder.end_episode(False)  # 1000스텝 제한은 실패로 기록
+            success_count += bool(info.get("success", False))
+
+        record_env.close()
+        print(f"🎬 녹화 완료: {len(recorder.saved)}개 파일 ({RECORD_DIR})")
+        print(f"✅ 성공률 {success_count}/{RECORD_EPISODES} ({(success_count / RECORD_EPISODES) * 100:.1f}%)")
+
+    else:
+        print("⚠️ MODE를 잘못 입력하셨습니다. 'train', 'resume', 'play' 또는 'record'로 입력해주세요.")
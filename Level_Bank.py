@@ -0,0 +1,181 @@
+import argparse
+import os
+import time
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from Game_Random import make_rng
+from Hole_Layout import generate_layouts, PAD_HOLE
+
+# 레벨 생성 기본값 (Balance_Game_Tuned 와 같은 보드)
+CENTER_X = 600
+CENTER_BAND = 60  # |hx - CENTER_X| < CENTER_BAND 인 구멍을 "중앙선 근처" 로 셈
+BALL_START = (600, 877)  # 공 시작 위치 (막대 y 900 - 반지름 - 5)
+MAX_ATTEMPT_FACTOR = 100  # 레벨 수의 이 배수만큼 후보를 만들어도 못 채우면 포기
+
+
+def level_dtype(max_holes, wind_steps):
+    """레벨 1개 레코드: 난이도 메타데이터 + 구멍 배치 + 바람 일정
+
+    구멍은 hole_count 개만 유효하고 나머지 칸은 PAD_HOLE 로 채운다.
+    바람 일정은 갱신 시점(50스텝)마다 쓸 값이고, 다 쓰면 게임 난수로 돌아간다.
+    """
+    return np.dtype([
+        ("hole_count", np.int16),
+        ("center_holes", np.int16),  # 중앙선 근처 구멍 수
+        ("min_gap", np.float32),  # 구멍 사이 최소 거리 (구멍 1개 이하면 inf)
+        ("start_gap", np.float32),  # 공 시작 위치에서 가장 가까운 구멍까지 거리
+        ("difficulty", np.float32),
+        ("holes", np.float64, (max_holes, 2)),  # 생성기 값 그대로 (게임 물리와 같은 float64)
+        ("wind_count", np.int16),
+        ("wind_strength", np.float32, (wind_steps,)),
+        ("wind_direction", np.int8, (wind_steps,)),
+        ("wind_variation", np.float32, (wind_steps,)),
+    ])
+
+
+def _fill_levels(rng, block, min_holes, max_holes, region, ball_radius, margin, min_gap=None, min_start_gap=None):
+    """block 의 모든 레벨을 생성하고 메타데이터 계산, 검증을 통과한 줄 마스크 반환
+
+    영역/격자 간격은 생성기(generate_layouts)가 보장하므로 다시 보지 않는다.
+    min_gap / min_start_gap 을 주면 구멍 사이 최소 거리나 공 시작 위치에서 가장 가까운 구멍까지
+    거리가 그보다 작은 레벨을 버린다 (구멍이 성긴 세트 등을 따로 만들 때).
+    기본값(None)은 거르지 않아 뱅크 분포가 실제 게임과 같다.
+    """
+    n = len(block)
+    counts = rng.integers(min_holes, max_holes + 1, n)
+    holes = np.full((n, max_holes, 2), PAD_HOLE)
+    for c in np.unique(counts):
+        rows = np.flatnonzero(counts == c)
+        holes[rows, :c] = generate_layouts(rng, len(rows), int(c), region=region,
+                                           ball_radius=ball_radius, margin=margin)
+    valid = np.arange(max_holes) < counts[:, None]
+
+    wind_steps = block.dtype["wind_strength"].shape[0]
+    block["wind_count"] = wind_steps
+    block["wind_strength"] = rng.uniform(0.02, 0.07, (n, wind_steps))
+    block["wind_direction"] = rng.choice(np.array([-1, 1], dtype=np.int8), (n, wind_steps))
+    block["wind_variation"] = rng.uniform(0.005, 0.02, (n, wind_steps))
+
+    block["hole_count"] = counts
+    block["holes"] = holes
+    block["center_holes"] = ((np.abs(holes[:, :, 0] - CENTER_X) < CENTER_BAND) & valid).sum(axis=1)
+    gap = np.hypot(holes[:, :, None, 0] - holes[:, None, :, 0], holes[:, :, None, 1] - holes[:, None, :, 1])
+    gap[~(valid[:, :, None] & valid[:, None, :])] = np.inf
+    gap[:, np.arange(max_holes), np.arange(max_holes)] = np.inf
+    block["min_gap"] = gap.min(axis=(1, 2)) if max_holes else np.inf
+    start = np.hypot(holes[:, :, 0] - BALL_START[0], holes[:, :, 1] - BALL_START[1])
+    block["start_gap"] = np.where(valid, start, np.inf).min(axis=1) if max_holes else np.inf
+    block["difficulty"] = (counts + 2.0 * block["center_holes"]
+                           + (100.0 * block["wind_strength"].mean(axis=1) if wind_steps else 0.0))
+
+    ok = np.ones(n, dtype=bool)
+    if min_gap is not None:
+        ok &= block["min_gap"] >= min_gap
+    if min_start_gap is not None:
+        ok &= block["start_gap"] >= min_start_gap
+    return ok
+
+
+def build_bank(path, n_levels, min_holes=8, max_holes=8, wind_steps=20, seed=0,
+               region=(375, 200, 825, 800), ball_radius=18, margin=20, min_gap=None, min_start_gap=None,
+               chunk=65536):
+    """검증된 레벨 n_levels 개를 .npy 파일 하나에 직접 기록 (memmap, 메모리에 전부 올리지 않음)
+
+    min_gap / min_start_gap 으로 거르는데 후보를 n_levels * MAX_ATTEMPT_FACTOR 개 만들어도
+    다 채우지 못하면 RuntimeError.
+    """
+    rng = make_rng(seed)
+    levels = open_memmap(path, mode="w+", dtype=level_dtype(max_holes, wind_steps), shape=(n_levels,))
+    chunk = max(1, min(chunk, (1 << 24) // max(max_holes * max_holes, 1)))  # 구멍 쌍 거리 배열 크기 제한
+
+    filled, attempts = 0, 0
+    while filled < n_levels:
+        if attempts >= n_levels * MAX_ATTEMPT_FACTOR:
+            del levels
+            os.remove(path)  # 덜 채운 파일 (빈 레벨) 을 뱅크로 쓰지 않도록
+            raise RuntimeError(f"후보 {attempts}개 중 검증을 통과한 레벨이 {filled}개뿐입니다 "
+                               f"(min_gap / min_start_gap 설정을 확인하세요)")
+        block = np.zeros(min(chunk, n_levels - filled), dtype=levels.dtype)
+        ok = _fill_levels(rng, block, min_holes, max_holes, region, ball_radius, margin, min_gap, min_start_gap)
+        attempts += len(block)
+        block = block[ok]
+        levels[filled:filled + len(block)] = block
+        filled += len(block)
+    levels.flush()
+    return LevelBank(path)
+
+
+class LevelBank:
+    """미리 만든 레벨 파일을 memmap 으로 열어 샘플링
+
+    파일을 읽기 전용 memmap 으로 열기 때문에 파싱 비용이 없고, 여러 워커 프로세스가
+    같은 파일을 열면 OS 페이지 캐시를 공유한다. 피클할 때는 경로만 넘기고 다시 연다.
+    select() 로 메타데이터 조건의 부분집합만 뽑게 할 수 있다.
+    예: bank.select(bank.levels["center_holes"] <= 4)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.levels = np.load(path, mmap_mode="r")
+        self.max_holes = self.levels.dtype["holes"].shape[0]
+        self.indices = None  # 샘플링 대상 레벨 번호 (None 이면 전체)
+
+    def __getstate__(self):
+        return {"path": self.path, "indices": self.indices}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+        self.indices = state["indices"]
+
+    def __len__(self):
+        return len(self.levels) if self.indices is None else len(self.indices)
+
+    def select(self, mask=None):
+        """mask(레벨 수 길이의 bool 배열) 가 True 인 레벨만 샘플링 (None 이면 전체)"""
+        self.indices = None if mask is None else np.flatnonzero(mask)
+        if self.indices is not None and len(self.indices) == 0:
+            raise ValueError("조건에 맞는 레벨이 없습니다")
+        return self
+
+    def sample(self, rng, n=None):
+        """레벨 번호 하나 (n 을 주면 n개 배열) 를 rng 로 뽑음"""
+        i = rng.integers(0, len(self), n)
+        return i if self.indices is None else self.indices[i]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="레벨 뱅크 생성/확인")
+    parser.add_argument("path", help="레벨 파일 경로 (.npy)")
+    parser.add_argument("--levels", type=int, default=0, help="생성할 레벨 수 (0 이면 기존 파일 정보만 출력)")
+    parser.add_argument("--min-holes", type=int, default=8)
+    parser.add_argument("--max-holes", type=int, default=8)
+    parser.add_argument("--wind-steps", type=int, default=20, help="레벨마다 저장할 바람 갱신 횟수")
+    parser.add_argument("--margin", type=float, default=20, help="격자 배치 구멍 사이 추가 간격")
+    parser.add_argument("--min-gap", type=float, default=None,
+                        help="구멍 사이 최소 거리가 이보다 작은 레벨은 버림")
+    parser.add_argument("--min-start-gap", type=float, default=None,
+                        help="공 시작 위치에서 가장 가까운 구멍까지 거리가 이보다 작은 레벨은 버림")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.levels > 0:
+        start = time.perf_counter()
+        build_bank(args.path, args.levels, min_holes=args.min_holes, max_holes=args.max_holes,
+                   wind_steps=args.wind_steps, seed=args.seed, margin=args.margin, min_gap=args.min_gap,
+                   min_start_gap=args.min_start_gap)
+        print(f"레벨 {args.levels}개 생성: {args.path} ({time.perf_counter() - start:.1f}초)")
+
+    bank = LevelBank(args.path)
+    levels = bank.levels
+    print(f"레벨 수: {len(levels)}, 최대 구멍 수: {bank.max_holes}, 레코드 크기: {levels.dtype.itemsize}B")
+    for name in ("hole_count", "center_holes", "min_gap", "start_gap", "difficulty"):
+        values = levels[name]
+        finite = values[np.isfinite(values)] if values.dtype.kind == "f" else values
+        if len(finite):
+            print(f"  {name:13s} min {finite.min():8.2f}  mean {finite.mean():8.2f}  max {finite.max():8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import time
+from collections import defaultdict
+
+
+class PhaseProfiler:
+    """구간별 누적 시간/호출 수 측정기
+
+    핫패스에서는 `if PROFILER.enabled:` 로 감싸서 start/stop 을 부르므로
+    꺼져 있을 때는 속성 검사 한 번 외에는 비용이 없다.
+    구간은 중첩 가능하며 "learn;env_step;reward" 같은 접힌 스택 키로 기록된다.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.inclusive = defaultdict(float)  # 접힌 스택 키 -> 누적 시간(초, 하위 구간 포함)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self._stack = []
+        self._t_enabled = time.perf_counter()
+
+    def enable(self):
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def start(self, name):
+        parent = self._stack[-1][0] if self._stack else None
+        key = f"{parent};{name}" if parent else name
+        self._stack.append((key, time.perf_counter()))
+
+    def stop(self):
+        key, t0 = self._stack.pop()
+        self.inclusive[key] += time.perf_counter() - t0
+        self.calls[key] += 1
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def self_times(self):
+        """키별 자기 시간 (하위 구간 시간 제외)"""
+        self_time = dict(self.inclusive)
+        for key, t in self.inclusive.items():
+            if ";" in key:
+                parent = key.rsplit(";", 1)[0]
+                if parent in self_time:
+                    self_time[parent] -= t
+        return self_time
+
+    def report(self):
+        """구간별 표 문자열 (접힌 스택 순서, 들여쓰기로 중첩 표시)"""
+        wall = time.perf_counter() - self._t_enabled
+        self_time = self.self_times()
+        lines = [f"{'phase':40s} {'calls':>10s} {'total ms':>12s} {'self ms':>12s} {'% wall':>7s}"]
+        for key in sorted(self.inclusive):
+            depth = key.count(";")
+            name = "  " * depth + key.rsplit(";", 1)[-1]
+            total = self.inclusive[key]
+            lines.append(f"{name:40s} {self.calls[key]:10d} {total * 1e3:12.1f} "
+                         f"{self_time[key] * 1e3:12.1f} {total / wall * 100:6.1f}%")
+        tracked = sum(t for key, t in self.inclusive.items() if ";" not in key)
+        lines.append(f"{'(untracked)':40s} {'':10s} {(wall - tracked) * 1e3:12.1f}")
+        for name, n in sorted(self.counters.items()):
+            lines.append(f"counter {name}: {n}")
+        return "\n".join(lines)
+
+    def write_folded(self, path):
+        """flamegraph.pl / speedscope 용 접힌 스택 파일 (값은 자기 시간 µs)"""
+        with open(path, "w", encoding="utf-8") as f:
+            for key, t in sorted(self.self_times().items()):
+                us = int(t * 1e6)
+                if us > 0:
+                    f.write(f"{key} {us}\n")
+
+
+PROFILER = PhaseProfiler()
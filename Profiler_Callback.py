@@ -0,0 +1,64 @@
+from stable_baselines3.common.callbacks import BaseCallback
+
+from Profiler import PROFILER
+
+
+def _timed(name, func):
+    def wrapper(*args, **kwargs):
+        if not PROFILER.enabled:
+            return func(*args, **kwargs)
+        PROFILER.start(name)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            PROFILER.stop()
+    return wrapper
+
+
+def instrument_env(env):
+    """gym 래퍼 체인(Monitor/TimeLimit/...)의 step 을 계층별 구간으로 감쌈"""
+    layer = env
+    while layer is not None:
+        layer.step = _timed(f"{type(layer).__name__}.step", layer.step)
+        layer = getattr(layer, "env", None)
+    return env
+
+
+class ProfilerCallback(BaseCallback):
+    """model.learn 루프 안의 정책 추론/환경 스텝/학습/평가/로그 기록 시간을 재는 콜백
+
+    report_freq 번 호출마다 표를 출력하고 folded_path 에 플레임그래프용 파일을 쓴다.
+    """
+
+    def __init__(self, report_freq=10000, folded_path="profile.folded", timed_callbacks=(), verbose=0):
+        super().__init__(verbose)
+        self.report_freq = report_freq
+        self.folded_path = folded_path
+        self.timed_callbacks = timed_callbacks
+
+    def _on_training_start(self):
+        if not PROFILER.enabled:
+            PROFILER.enable()
+        model = self.model
+        model.predict = _timed("policy_forward", model.predict)
+        model.train = _timed("train", model.train)
+        model.logger.dump = _timed("logger_dump", model.logger.dump)
+        model.env.step_wait = _timed("env_step", model.env.step_wait)
+        for env in getattr(model.env, "envs", []):
+            instrument_env(env)
+        for callback in self.timed_callbacks:
+            callback._on_step = _timed(type(callback).__name__, callback._on_step)
+
+    def _on_step(self):
+        PROFILER.count("env_steps", self.training_env.num_envs)
+        if self.n_calls % self.report_freq == 0:
+            self._dump()
+        return True
+
+    def _on_training_end(self):
+        self._dump()
+
+    def _dump(self):
+        print(PROFILER.report())
+        if self.folded_path:
+            PROFILER.write_folded(self.folded_path)
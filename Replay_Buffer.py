@@ -0,0 +1,372 @@
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+from gymnasium import spaces
+from stable_baselines3.common.buffers import BaseBuffer
+from stable_baselines3.common.type_aliases import ReplayBufferSamples
+
+# 관측 앞부분 (공/막대/바람 7개) 만 매 스텝 바뀌고 나머지 구멍 좌표는 에피소드 동안 고정
+DYNAMIC_DIM = 7
+# 전환별 저장 배열 (줄 = add() 1회)
+ROW_ARRAYS = ("observations", "finals", "actions", "rewards", "dones", "timeouts", "episode_ids")
+
+
+class StaticContextReplayBuffer(BaseBuffer):
+    """에피소드 고정 관측(구멍 좌표)을 에피소드당 한 번만 저장하는 ReplayBuffer
+
+    전환마다 obs 의 앞 dynamic_dim 개와 에피소드 번호(int32)만 저장하고,
+    구멍 좌표는 에피소드 번호로 찾는 문맥 테이블에 한 줄씩 둔다.
+    next_obs 는 SB3 optimize_memory_usage 처럼 같은 env 의 다음 줄 obs 로 만든다. 에피소드
+    마지막 전환(종료/시간 제한, finals)만 다음 줄이 새 에피소드라서, 그 next_obs 동적 부분은
+    문맥 테이블 줄 앞쪽에 에피소드당 한 번 둔다. 샘플링할 때 두 부분을 합쳐 원래 관측을 만들고,
+    다음 줄이 아직 없는 가장 최근 줄은 뽑지 않는다.
+    DQN(replay_buffer_class=StaticContextReplayBuffer) 로 ReplayBuffer 대신 쓴다.
+
+    새 에피소드는 직전 전환이 끝났거나 env 별 고정 부분이 달라지면 시작한다. 직전 next_obs 와
+    이번 obs 가 다르면 (learn() 을 다시 불러 env 가 리셋된 경우 등) 직전 줄도 마지막 전환으로 돌린다.
+    문맥 테이블은 링 버퍼이고, 버퍼에 남은 전환이 가리키는 문맥을 덮어쓰게 되면 두 배로 늘린다.
+    """
+
+    def __init__(self, buffer_size, observation_space, action_space, device="auto", n_envs=1,
+                 optimize_memory_usage=False, handle_timeout_termination=True, dynamic_dim=DYNAMIC_DIM,
+                 context_capacity=None):
+        super().__init__(buffer_size, observation_space, action_space, device, n_envs=n_envs)
+        if optimize_memory_usage:
+            raise ValueError("StaticContextReplayBuffer 는 optimize_memory_usage 를 지원하지 않습니다")
+        self.optimize_memory_usage = False
+        self.handle_timeout_termination = handle_timeout_termination
+        self.buffer_size = max(buffer_size // n_envs, 1)
+        self.dynamic_dim = dynamic_dim
+        obs_dim = int(np.prod(self.obs_shape))
+        self.obs_dtype = observation_space.dtype
+
+        # 전환별 (동적 부분만)
+        rows = (self.buffer_size, n_envs)
+        self.observations = self._array("observations", rows + (dynamic_dim,), self.obs_dtype)
+        self.finals = self._array("finals", rows, bool)  # next_obs 를 문맥 테이블에서 읽는 줄
+        small_discrete = isinstance(action_space, spaces.Discrete) and action_space.n <= 256
+        self.actions = self._array("actions", rows + (self.action_dim,), np.uint8 if small_discrete else np.float32)
+        self.rewards = self._array("rewards", rows, np.float32)
+        self.dones = self._array("dones", rows, bool)
+        self.timeouts = self._array("timeouts", rows, bool)
+        self.episode_ids = self._array("episode_ids", rows, np.int32)
+
+        # 에피소드별 [마지막 next_obs 동적 부분, 고정 부분]: contexts[episode_id % capacity]
+        capacity = context_capacity or max(self.buffer_size * n_envs // 64, 2 * n_envs)
+        self.contexts = self._array("contexts", (capacity, obs_dim), self.obs_dtype)
+        self._env_episode = np.full(n_envs, -1, dtype=np.int64)  # env 별 현재 에피소드 번호
+        self._env_final = np.zeros(n_envs, dtype=bool)  # env 별 현재 에피소드가 끝났는지
+        self._next_episode = 0
+        self._last_next = None  # 직전 add() 의 next_obs 동적 부분 (연속성 확인용)
+
+    def _array(self, name, shape, dtype):
+        """저장 배열 생성 (MemmapReplayBuffer 는 파일 매핑으로 바꿈)"""
+        return np.zeros(shape, dtype=dtype)
+
+    def nbytes(self):
+        """저장 배열 전체 바이트 수"""
+        return sum(getattr(self, name).nbytes for name in ROW_ARRAYS + ("contexts",))
+
+    def _oldest_episode(self):
+        """버퍼에 남은 전환이 가리키는 가장 오래된 에피소드 번호"""
+        if self.full:
+            return int(self.episode_ids[self.pos].min())
+        if self.pos == 0:
+            return self._next_episode
+        return int(self.episode_ids[0].min())
+
+    def _grow_contexts(self, oldest):
+        old = self.contexts
+        grown = np.zeros((2 * len(old), old.shape[1]), dtype=old.dtype)
+        live = np.arange(oldest, self._next_episode)
+        grown[live % len(grown)] = old[live % len(old)]
+        self.contexts = self._replace_contexts(grown)
+
+    def _replace_contexts(self, grown):
+        return grown
+
+    def add(self, obs, next_obs, action, reward, done, infos):
+        obs = obs.reshape((self.n_envs, -1))
+        next_obs = next_obs.reshape((self.n_envs, -1))
+        static = obs[:, self.dynamic_dim:]
+
+        # 직전 next_obs 와 이어지지 않는 env 는 직전 줄을 그 에피소드의 마지막 전환으로
+        if self._last_next is not None:
+            broken = ~self._env_final & (self._last_next != obs[:, :self.dynamic_dim]).any(axis=1)
+            if broken.any():
+                last = (self.pos - 1) % self.buffer_size
+                self.finals[last, broken] = True
+                self.contexts[self._env_episode[broken] % len(self.contexts), :self.dynamic_dim] = \
+                    self._last_next[broken]
+                self._env_final |= broken
+
+        # 직전 에피소드가 끝났거나 고정 부분이 바뀐 env 는 새 에피소드 문맥을 할당
+        current = self.contexts[self._env_episode % len(self.contexts), self.dynamic_dim:]
+        changed = np.flatnonzero((self._env_episode < 0) | self._env_final | (current != static).any(axis=1))
+        if len(changed):
+            oldest = self._oldest_episode()
+            while self._next_episode + len(changed) - oldest > len(self.contexts):
+                self._grow_contexts(oldest)
+            ids = np.arange(self._next_episode, self._next_episode + len(changed))
+            self._next_episode += len(changed)
+            self.contexts[ids % len(self.contexts), self.dynamic_dim:] = static[changed]
+            self._env_episode[changed] = ids
+            self._env_final[changed] = False
+
+        # 끝난 전환의 next_obs (terminal_observation) 는 에피소드 문맥에
+        done = np.asarray(done, dtype=bool).reshape(self.n_envs)
+        if done.any():
+            self.contexts[self._env_episode[done] % len(self.contexts), :self.dynamic_dim] = \
+                next_obs[done, :self.dynamic_dim]
+        self._env_final |= done
+        self._last_next = next_obs[:, :self.dynamic_dim].copy()
+
+        self.observations[self.pos] = obs[:, :self.dynamic_dim]
+        self.finals[self.pos] = done
+        self.actions[self.pos] = np.asarray(action).reshape((self.n_envs, self.action_dim))
+        self.rewards[self.pos] = reward
+        self.dones[self.pos] = done
+        self.episode_ids[self.pos] = self._env_episode
+        if self.handle_timeout_termination:
+            self.timeouts[self.pos] = [info.get("TimeLimit.truncated", False) for info in infos]
+
+        self.pos += 1
+        if self.pos == self.buffer_size:
+            self.full = True
+            self.pos = 0
+
+    def sample(self, batch_size, env=None):
+        """가장 최근 줄을 뺀 나머지에서 균등하게 뽑음 (그 줄의 next_obs 가 될 다음 줄이 아직 없음)"""
+        upper = self.buffer_size if self.full else self.pos
+        if upper < 2:
+            raise ValueError("샘플링할 수 있는 전환이 없습니다 (2줄 이상 필요)")
+        oldest = self.pos if self.full else 0
+        batch_inds = (oldest + np.random.randint(0, upper - 1, size=batch_size)) % self.buffer_size
+        return self._get_samples(batch_inds, env=env)
+
+    def _assemble(self, dynamic, static):
+        obs = np.empty((len(dynamic),) + self.obs_shape, dtype=self.obs_dtype)
+        flat = obs.reshape(len(dynamic), -1)
+        flat[:, :self.dynamic_dim] = dynamic
+        flat[:, self.dynamic_dim:] = static
+        return obs
+
+    def _get_samples(self, batch_inds, env=None):
+        env_indices = np.random.randint(0, high=self.n_envs, size=(len(batch_inds),))
+        context = self.contexts[self.episode_ids[batch_inds, env_indices] % len(self.contexts)]
+        static = context[:, self.dynamic_dim:]
+        obs = self._assemble(self.observations[batch_inds, env_indices], static)
+        following = self.observations[(batch_inds + 1) % self.buffer_size, env_indices]
+        final = self.finals[batch_inds, env_indices]
+        next_obs = self._assemble(np.where(final[:, None], context[:, :self.dynamic_dim], following), static)
+
+        dones = self.dones[batch_inds, env_indices] & ~self.timeouts[batch_inds, env_indices]
+        data = (
+            self._normalize_obs(obs, env),
+            self.actions[batch_inds, env_indices].astype(np.int64 if self.actions.dtype == np.uint8 else np.float32),
+            self._normalize_obs(next_obs, env),
+            dones.astype(np.float32).reshape(-1, 1),
+            self._normalize_reward(self.rewards[batch_inds, env_indices].reshape(-1, 1), env),
+        )
+        return ReplayBufferSamples(*tuple(map(self.to_torch, data)))
+
+
+class MemmapReplayBuffer(StaticContextReplayBuffer):
+    """StaticContextReplayBuffer 의 저장 배열을 path 디렉터리의 .npy 파일 매핑으로 둔 버전
+
+    배열은 처음에 파일 크기만큼 미리 만들어 두고 add() 는 매핑에 직접 쓰며,
+    sample() 도 매핑에서 바로 읽는다. header.npy 에 쓰기 위치(pos), 가득 참(full),
+    에피소드 번호 상태를 매 add() 마다 (데이터를 쓴 뒤에) 기록한다.
+    같은 path 와 같은 크기로 다시 만들면 기존 파일을 그대로 열어 이어 쓴다 (피클 없음).
+    프로세스가 죽어도 매핑에 쓴 내용은 OS 가 파일에 반영하고, 기계가 꺼지는 경우까지
+    대비하려면 체크포인트마다 flush() 를 호출한다.
+
+    체크포인트에서 재개할 때는 체크포인트 뒤에 덮어쓴 줄을 되돌려야 한다 (checkpoint_arrays /
+    restore_checkpoint). 체크포인트마다 앞으로 덮어쓸 window 줄과 문맥 테이블을 복사해 두고,
+    그보다 많이 쓴 뒤에 죽었다면 되돌릴 수 없는 줄은 stale 구간으로 표시해 다시 쓰기 전까지 샘플에서 뺀다.
+    """
+
+    def __init__(self, buffer_size, observation_space, action_space, device="auto", n_envs=1,
+                 optimize_memory_usage=False, handle_timeout_termination=True, dynamic_dim=DYNAMIC_DIM,
+                 context_capacity=None, path="./replay_buffer", resume=True):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        header_dtype = np.dtype([
+            ("buffer_size", np.int64),
+            ("n_envs", np.int64),
+            ("obs_dim", np.int64),
+            ("dynamic_dim", np.int64),
+            ("pos", np.int64),
+            ("full", np.bool_),
+            ("next_episode", np.int64),
+            ("env_episode", np.int64, (n_envs,)),
+            ("env_final", np.bool_, (n_envs,)),
+            ("rows", np.int64),  # 지금까지 add() 한 줄 수
+            ("stale_start", np.int64),
+            ("stale_len", np.int64),
+        ])
+        expected = (max(buffer_size // n_envs, 1), n_envs, int(np.prod(observation_space.shape)), dynamic_dim)
+        header_path = os.path.join(path, "header.npy")
+        self.resumed = False
+        if resume and os.path.exists(header_path):
+            header = np.load(header_path, mmap_mode="r+")
+            if header.dtype == header_dtype and tuple(int(header[k]) for k in header_dtype.names[:4]) == expected:
+                self.resumed = True
+                self.header = header
+        if not self.resumed:
+            self.header = open_memmap(header_path, mode="w+", dtype=header_dtype, shape=())
+            for name, value in zip(header_dtype.names[:4], expected):
+                self.header[name] = value
+            self.header["env_episode"] = -1
+            self.header.flush()
+
+        super().__init__(buffer_size, observation_space, action_space, device, n_envs=n_envs,
+                         optimize_memory_usage=optimize_memory_usage,
+                         handle_timeout_termination=handle_timeout_termination, dynamic_dim=dynamic_dim,
+                         context_capacity=context_capacity)
+        self._rows = 0
+        self._stale_start, self._stale_len = 0, 0  # 샘플에서 뺄 줄 [start, start + len) (링)
+        if self.resumed:
+            self.pos = int(self.header["pos"])
+            self.full = bool(self.header["full"])
+            self._next_episode = int(self.header["next_episode"])
+            self._env_episode[:] = self.header["env_episode"]
+            self._env_final[:] = self.header["env_final"]
+            self._rows = int(self.header["rows"])
+            self._stale_start = int(self.header["stale_start"])
+            self._stale_len = int(self.header["stale_len"])
+
+    def _file(self, name):
+        return os.path.join(self.path, name + ".npy")
+
+    def _array(self, name, shape, dtype):
+        if self.resumed:
+            array = np.load(self._file(name), mmap_mode="r+")
+            # 문맥 테이블은 커졌을 수 있으므로 줄 수는 파일을 따름
+            if array.dtype == dtype and array.shape[1:] == shape[1:] and (name == "contexts" or array.shape == shape):
+                return array
+            raise ValueError(f"{self._file(name)} 의 모양/형식이 버퍼 설정과 다릅니다")
+        return open_memmap(self._file(name), mode="w+", dtype=dtype, shape=shape)
+
+    def _replace_contexts(self, grown):
+        # 새 파일을 다 쓴 뒤 이름을 바꿔 교체 (중간에 죽어도 기존 파일은 온전함)
+        tmp = self._file("contexts.tmp")
+        array = open_memmap(tmp, mode="w+", dtype=grown.dtype, shape=grown.shape)
+        array[:] = grown
+        array.flush()
+        del array
+        os.replace(tmp, self._file("contexts"))
+        return np.load(self._file("contexts"), mmap_mode="r+")
+
+    def add(self, obs, next_obs, action, reward, done, infos):
+        if self._stale_len and self.pos == self._stale_start:
+            # stale 구간 첫 줄을 새로 쓰므로 구간이 한 줄 줄어듦
+            self._stale_start = (self._stale_start + 1) % self.buffer_size
+            self._stale_len -= 1
+        super().add(obs, next_obs, action, reward, done, infos)
+        self._rows += 1
+        self._write_header()
+
+    def _oldest_episode(self):
+        oldest = super()._oldest_episode()
+        if self._stale_len:
+            # stale 줄은 에피소드 번호가 더 클 수 있으므로 stale 구간 바로 뒤 줄도 봄
+            after = (self._stale_start + self._stale_len) % self.buffer_size
+            if self.full or after < self.pos:
+                oldest = min(oldest, int(self.episode_ids[after].min()))
+        return oldest
+
+    def _write_header(self):
+        header = self.header
+        header["next_episode"] = self._next_episode
+        header["env_episode"] = self._env_episode
+        header["env_final"] = self._env_final
+        header["rows"] = self._rows
+        header["stale_start"] = self._stale_start
+        header["stale_len"] = self._stale_len
+        header["full"] = self.full
+        header["pos"] = self.pos
+
+    def sample(self, batch_size, env=None):
+        if not self._stale_len:
+            return super().sample(batch_size, env=env)
+        upper = self.buffer_size if self.full else self.pos
+        oldest = self.pos if self.full else 0
+        # stale 구간 바로 앞 줄도 next_obs (다음 줄) 가 stale 이라 뺌
+        start = (self._stale_start - 1) % self.buffer_size
+        length = self._stale_len + 1
+        # 뽑는 범위 (oldest 부터 upper - 1 줄) 중 빼는 구간 (링에서 최대 두 조각) 과 겹치는 줄 수
+        domain, rel = upper - 1, (start - oldest) % self.buffer_size
+        overlap = (max(0, min(rel + length, domain) - min(rel, domain))
+                   + max(0, min(rel + length - self.buffer_size, domain)))
+        if overlap >= domain:
+            raise ValueError("샘플링할 수 있는 전환이 없습니다 (모두 stale 구간)")
+        batch_inds = (oldest + np.random.randint(0, domain, size=batch_size)) % self.buffer_size
+        stale = (batch_inds - start) % self.buffer_size < length
+        while stale.any():
+            batch_inds[stale] = (oldest + np.random.randint(0, domain, size=int(stale.sum()))) % self.buffer_size
+            stale = (batch_inds - start) % self.buffer_size < length
+        return self._get_samples(batch_inds, env=env)
+
+    def checkpoint_arrays(self, window):
+        """체크포인트용 복사본: pos - 1 부터 window + 1 줄 + 문맥 테이블
+
+        pos 부터는 체크포인트 뒤에 먼저 덮어쓸 줄이고, pos - 1 은 다음 add() 가 마지막 전환
+        (finals) 으로 바꿀 수 있는 줄이다.
+        """
+        rows = (self.pos - 1 + np.arange(min(window + 1, self.buffer_size))) % self.buffer_size
+        arrays = {name: getattr(self, name)[rows] for name in ROW_ARRAYS}
+        arrays["contexts"] = np.array(self.contexts)
+        return arrays
+
+    def restore_checkpoint(self, state, arrays):
+        """checkpoint_arrays() 시점으로 되돌림
+
+        체크포인트 뒤에 쓴 줄 수(파일 헤더 rows 차이)가 window 이하면 그대로 복원되고,
+        넘으면 넘친 줄은 원래 내용을 알 수 없으므로 stale 구간으로 표시한다.
+        """
+        written = self._rows - int(state["_rows"])
+        for k, v in state.items():
+            if k in ("_env_episode", "_env_final"):
+                getattr(self, k)[:] = v
+            else:
+                setattr(self, k, v)
+        self._last_next = None  # 재개한 env 는 체크포인트 때 관측에서 이어짐
+        copied = len(arrays["rewards"])
+        rows = (self.pos - 1 + np.arange(copied)) % self.buffer_size
+        window = self.buffer_size if copied == self.buffer_size else copied - 1  # pos 부터 되돌린 줄 수
+        for name in ROW_ARRAYS:
+            getattr(self, name)[rows] = arrays[name]
+        self.contexts = self._replace_contexts(arrays["contexts"])
+
+        lost = min(written, self.buffer_size)
+        if lost > window:
+            start, end = window, lost  # pos 기준 상대 위치
+            if self._stale_len:  # 체크포인트 때 이미 있던 stale 구간과 합침 (둘 다 pos 앞쪽)
+                old = (self._stale_start - self.pos) % self.buffer_size
+                start, end = min(start, old), max(end, old + self._stale_len)
+            self._stale_start = (self.pos + start) % self.buffer_size
+            self._stale_len = min(end, self.buffer_size) - start
+        self._write_header()
+        self.flush()
+
+    def flush(self):
+        """매핑된 배열을 파일에 동기화 (헤더는 데이터 다음에)"""
+        for name in ROW_ARRAYS + ("contexts",):
+            getattr(self, name).flush()
+        self.header.flush()
+
+    def __getstate__(self):
+        # 피클에는 배열 대신 설정만 담고, 복원할 때 같은 파일을 다시 연다
+        self.flush()
+        state = self.__dict__.copy()
+        for name in ROW_ARRAYS + ("contexts", "header"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.header = np.load(os.path.join(self.path, "header.npy"), mmap_mode="r+")
+        for name in ROW_ARRAYS + ("contexts",):
+            setattr(self, name, np.load(self._file(name), mmap_mode="r+"))
@@ -0,0 +1,312 @@
+import math
+import numpy as np
+
+
+def _square(x):
+    """x*x 를 (반올림된 값, 정확한 오차) 쌍으로 계산 (Dekker 분할)"""
+    p = x * x
+    c = 134217729.0 * x  # 2**27 + 1
+    hi = c - (c - x)
+    lo = x - hi
+    err = ((hi * hi - p) + 2.0 * hi * lo) + lo * lo
+    return p, err
+
+
+def hypot(dx, dy):
+    """math.hypot 과 비트 단위로 같은 결과를 내는 배열용 hypot
+
+    np.hypot 은 C 라이브러리 hypot 을 써서 math.hypot 과 마지막 자리가 가끔 다르다.
+    CPython 의 vector_norm (2차원) 알고리즘을 그대로 옮겨서 보상 회귀 비교가 정확히 맞도록 한다.
+    """
+    dx = np.asarray(dx, dtype=np.float64)
+    dy = np.asarray(dy, dtype=np.float64)
+    m = np.maximum(np.abs(dx), np.abs(dy))
+    _, e = np.frexp(m)
+    scale = np.ldexp(1.0, -e)
+
+    csum = np.ones_like(m)
+    frac1 = np.zeros_like(m)
+    frac2 = np.zeros_like(m)
+    for v in (dx, dy):
+        hi, lo = _square(v * scale)
+        s = csum + hi
+        frac1 += lo
+        frac2 += hi - (s - csum)
+        csum = s
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        h = np.sqrt(csum - 1.0 + (frac1 + frac2))
+        hi, lo = _square(h)
+        s = csum - hi
+        frac1 -= lo
+        frac2 += -hi - (s - csum)
+        h += (s - 1.0 + (frac1 + frac2)) / (2.0 * h)
+        return np.where(m == 0.0, 0.0, h / scale)
+
+
+def compute_reward(ball_x, ball_y, prev_y, hole_x, hole_y, wind_strength, success, game_over,
+                   ball_radius=18, bar_width=450, goal_x=600, goal_top=40, index=None):
+    """Env_Rainforce_Tuned 보상의 배치 커널
+
+    ball_x, ball_y, prev_y, wind_strength, success, game_over: (N,)
+    hole_x, hole_y: (N, H)
+    구멍까지의 거리 (N, H) 를 한 번만 계산하고 모든 항을 거기서 뽑는다.
+    index(Hole_Index.BatchHoleIndex) 를 주면 공 근처 칸의 구멍 후보 (N, K) 만 계산하고
+    통과 판정은 정렬된 구멍 y 에서 이분 탐색한다 (구멍이 많을 때).
+    """
+    passed_count = None
+    if index is not None:
+        candidates = index.gather(ball_x, ball_y)
+        hole_x, hole_y = candidates[:, :, 0], candidates[:, :, 1]
+        passed_count = index.count_passed(ball_y, prev_y)
+
+    # x 중심 보상
+    x_dist = np.abs(ball_x - goal_x)
+    max_x_dist = bar_width / 2
+    x_center_score = np.maximum(0.0, 1.0 - (x_dist / max_x_dist))
+    x_weight = 2.5
+
+    # y 상승 보상 (상승만 확실히)
+    delta_y = prev_y - ball_y
+    vertical_score = np.where(delta_y > 0, delta_y * 2.0, delta_y * 0.2)
+
+    # 구멍까지 거리 (한 번만 계산)
+    # 거리는 danger_zone * 2 이하에서만 값 자체가 쓰이므로, 그 근처만 math.hypot 과 같은 값으로 보정
+    danger_zone = ball_radius * 2.5
+    dx = ball_x[:, None] - hole_x
+    dy = ball_y[:, None] - hole_y
+    dist = np.hypot(dx, dy)
+    close = dist < danger_zone * 2 + 1.0
+    if close.any():
+        dist[close] = hypot(dx[close], dy[close])
+    if dist.shape[1]:
+        min_hole_dist = dist.min(axis=1)
+    else:
+        min_hole_dist = np.full(len(ball_x), 999.0)
+
+    # 구멍/바람 근처 판단
+    wind_threshold = 0.04
+    hole_near = min_hole_dist < danger_zone * 2
+    strong_wind = wind_strength > wind_threshold
+    y_weight = np.where(hole_near | strong_wind, 1.0, 1.2)
+
+    # x 중심이 심하게 깨지면 y 보상을 0으로
+    vertical_reward = np.where(x_center_score < 0.5, 0.0, y_weight * vertical_score)
+
+    # 아직 홀 아래쪽이면서 아주 가까울 때
+    very_close_danger_zone = ball_radius * 1.1
+    very_close_to_hole = ((dist < very_close_danger_zone) & (ball_y[:, None] > hole_y)).any(axis=1)
+    vertical_reward = np.where(very_close_to_hole, 0.2, vertical_reward)
+
+    center_reward = x_weight * x_center_score
+
+    # 목표 근처 추가 shaping
+    rising = delta_y > 0
+    near_goal = rising & (ball_y < goal_top + 200)
+    mid_goal = rising & (ball_y < goal_top + 500) & ~near_goal
+    bonus = np.where(near_goal, 15.0, np.where(mid_goal, 5.0, 0.0))
+    penalty_coeff = np.where(near_goal, -150.0 * 3.0, np.where(mid_goal, -150.0 * 2.0, -150.0))
+
+    # 구멍 패널티 (가장 가까운 구멍 기준)
+    safe_dist = ball_radius * 2.0
+    penalized = min_hole_dist < safe_dist
+    hole_penalty = np.zeros(len(ball_x))
+    if penalized.any():
+        ratio = (safe_dist - min_hole_dist[penalized]) / safe_dist
+        # 파이썬 float 의 ** 는 libm pow 라서 ratio * ratio 와 마지막 자리가 다를 수 있음 -> 기존 계산 그대로
+        ratio_sq = np.array([r ** 2 for r in ratio.tolist()])
+        hole_penalty[penalized] = penalty_coeff[penalized] * ratio_sq
+
+    # 구멍 통과 보상
+    if passed_count is None:
+        passed_count = ((prev_y[:, None] > hole_y) & (ball_y[:, None] <= hole_y)).sum(axis=1)
+    pass_reward = 25.0 * passed_count
+
+    # 시간 패널티
+    time_penalty = -0.02
+
+    # 골인 높이에 도달한 경우 x좌표가 골인지점 x에 가까울수록 추가 보상
+    x_goal_bonus = np.where(ball_y <= goal_top + 30, 2.0 * x_center_score, 0.0)
+
+    reward = center_reward + vertical_reward + hole_penalty + pass_reward + time_penalty + bonus + x_goal_bonus
+    return np.where(success, 200.0, np.where(game_over, -100.0, reward))
+
+
+def compute_reward_indexed(ball_x, ball_y, prev_y, index, wind_strength,
+                           ball_radius=18, bar_width=450, goal_x=600, goal_top=40):
+    """게임 1개용 커널 (성공/실패 판정 이후 호출, EmotionBalanceEnv 의 JIT 없는 경로)
+
+    원소 8개짜리 배열에서는 NumPy 호출 비용이 계산보다 커서 파이썬 float 으로 계산하고,
+    거리는 Hole_Index.HoleIndex 로 공 근처 칸의 구멍만 본다. 보상은 가장 가까운 구멍 거리를
+    danger_zone * 2 (= 격자 칸 크기) 미만인지로만 쓰므로 더 먼 구멍은 결과를 바꾸지 않는다.
+    통과 판정은 정렬된 구멍 y 에서 이분 탐색.
+    """
+    x_center_score = max(0.0, 1.0 - (abs(ball_x - goal_x) / (bar_width / 2)))
+
+    delta_y = prev_y - ball_y
+    vertical_score = delta_y * 2.0 if delta_y > 0 else delta_y * 0.2
+
+    very_close_danger_zone = ball_radius * 1.1
+    min_hole_dist = 999
+    very_close_to_hole = False
+    for hx, hy in index.near(ball_x, ball_y):
+        dist = math.hypot(ball_x - hx, ball_y - hy)
+        if dist < min_hole_dist:
+            min_hole_dist = dist
+        if dist < very_close_danger_zone and ball_y > hy:
+            very_close_to_hole = True
+    pass_reward = 25.0 * index.count_passed(ball_y, prev_y)
+
+    if very_close_to_hole:
+        vertical_reward = 0.2
+    elif x_center_score < 0.5:
+        vertical_reward = 0.0
+    elif min_hole_dist < ball_radius * 2.5 * 2 or wind_strength > 0.04:
+        vertical_reward = 1.0 * vertical_score
+    else:
+        vertical_reward = 1.2 * vertical_score
+
+    penalty_coeff = -150.0
+    bonus = 0.0
+    if delta_y > 0 and ball_y < goal_top + 200:
+        bonus = 15.0
+        penalty_coeff *= 3.0
+    elif delta_y > 0 and ball_y < goal_top + 500:
+        bonus = 5.0
+        penalty_coeff *= 2.0
+
+    hole_penalty = 0.0
+    safe_dist = ball_radius * 2.0
+    if min_hole_dist < safe_dist:
+        ratio = (safe_dist - min_hole_dist) / safe_dist
+        hole_penalty = penalty_coeff * (ratio ** 2)
+
+    x_goal_bonus = 2.0 * x_center_score if ball_y <= goal_top + 30 else 0.0
+
+    return 2.5 * x_center_score + vertical_reward + hole_penalty + pass_reward - 0.02 + bonus + x_goal_bonus
+
+
+def reference_reward(game, prev_y):
+    """기존 EmotionBalanceEnv._compute_reward (구멍 리스트 반복 버전) - 회귀 비교용"""
+    if game.success:
+        return +200.0
+    if game.game_over:
+        return -100.0
+
+    ball_x, ball_y = game.ball_x, game.ball_y
+    goal_x = game.goal_centerx
+    goal_top = game.goal_top
+
+    x_dist = abs(ball_x - goal_x)
+    max_x_dist = game.bar_width / 2
+    x_center_score = max(0.0, 1.0 - (x_dist / max_x_dist))
+    x_weight = 2.5
+
+    delta_y = prev_y - ball_y
+    if delta_y > 0:
+        vertical_score = delta_y * 2.0
+    else:
+        vertical_score = delta_y * 0.2
+
+    wind_strength = game.wind_strength
+    wind_threshold = 0.04
+    min_hole_dist = min(
+        [math.hypot(ball_x - hx, ball_y - hy) for hx, hy in game.holes]) if game.holes else 999
+    danger_zone = game.ball_radius * 2.5
+    hole_near = min_hole_dist < danger_zone * 2
+    strong_wind = wind_strength > wind_threshold
+
+    y_weight = 1.2
+    if hole_near or strong_wind:
+        y_weight = 1.0
+
+    if x_center_score < 0.5:
+        vertical_reward = 0.0
+    else:
+        vertical_reward = y_weight * vertical_score
+
+    very_close_danger_zone = game.ball_radius * 1.1
+    very_close_to_hole = False
+    for hx, hy in game.holes:
+        dist = math.hypot(ball_x - hx, ball_y - hy)
+        if dist < very_close_danger_zone and ball_y > hy:
+            very_close_to_hole = True
+            break
+
+    if very_close_to_hole:
+        vertical_reward = 0.2
+
+    center_reward = x_weight * x_center_score
+
+    penalty_coeff = -150.0
+    bonus = 0.0
+    if delta_y > 0 and ball_y < goal_top + 200:
+        bonus = 15.0
+        penalty_coeff *= 3.0
+    elif delta_y > 0 and ball_y < goal_top + 500:
+        bonus = 5.0
+        penalty_coeff *= 2.0
+
+    hole_penalty = 0.0
+    for hx, hy in game.holes:
+        dist = math.hypot(ball_x - hx, ball_y - hy)
+        safe_dist = game.ball_radius * 2.0
+        if dist < safe_dist:
+            ratio = (safe_dist - min_hole_dist) / safe_dist
+            hole_penalty = penalty_coeff * (ratio ** 2)
+
+    pass_reward = 0.0
+    for hx, hy in game.holes:
+        if prev_y > hy and ball_y <= hy:
+            pass_reward += +25.0
+
+    time_penalty = -0.02
+
+    x_goal_bonus = 0.0
+    if ball_y <= goal_top + 30:
+        x_goal_bonus = 2.0 * x_center_score
+
+    return center_reward + vertical_reward + hole_penalty + pass_reward + time_penalty + bonus + x_goal_bonus
+
+
+if __name__ == "__main__":
+    # 회귀 검사: 무작위 상태에서 배치 커널 == 기존 구현 (비트 단위)
+    from types import SimpleNamespace
+    from Hole_Index import HoleIndex, BatchHoleIndex
+
+    rng = np.random.default_rng(0)
+    n, n_holes = 200_000, 8
+    hole_x = rng.integers(300, 831, (n, n_holes)).astype(np.float64)
+    hole_y = np.tile(np.array([200, 450, 600, 480, 550, 700, 800, 350], dtype=np.float64), (n, 1))
+    near = rng.random(n) < 0.5
+    ball_x = np.where(near, hole_x[:, 0] + rng.uniform(-60, 60, n), rng.uniform(370, 830, n))
+    ball_y = np.where(near, hole_y[:, 0] + rng.uniform(-60, 60, n), rng.uniform(30, 1000, n))
+    prev_y = ball_y + rng.uniform(-15, 15, n)
+    wind_strength = rng.uniform(0.02, 0.07, n)
+    game_over = rng.random(n) < 0.02
+    success = game_over & (rng.random(n) < 0.5)
+
+    batch = compute_reward(ball_x, ball_y, prev_y, hole_x, hole_y, wind_strength, success, game_over)
+    # 격자 인덱스 배치 버전은 메모리 때문에 앞쪽 일부만
+    m = 5000
+    index = BatchHoleIndex(m)
+    index.build(np.stack([hole_x[:m], hole_y[:m]], axis=2))
+    batch_indexed = compute_reward(ball_x[:m], ball_y[:m], prev_y[:m], hole_x[:m], hole_y[:m], wind_strength[:m],
+                                   success[:m], game_over[:m], index=index)
+    mismatch = int((batch_indexed != batch[:m]).sum())
+    single_mismatch = 0
+    for i in range(n):
+        game = SimpleNamespace(ball_x=ball_x[i].item(), ball_y=ball_y[i].item(),
+                               holes=[(int(hx), int(hy)) for hx, hy in zip(hole_x[i], hole_y[i])],
+                               wind_strength=wind_strength[i].item(), success=bool(success[i]),
+                               game_over=bool(game_over[i]), goal_centerx=600, goal_top=40,
+                               bar_width=450, ball_radius=18)
+        reference = reference_reward(game, prev_y[i].item())
+        if reference != batch[i]:
+            mismatch += 1
+        if not game.game_over:
+            indexed = compute_reward_indexed(game.ball_x, game.ball_y, prev_y[i].item(), HoleIndex(game.holes),
+                                             game.wind_strength)
+            if reference != indexed:
+                single_mismatch += 1
+    print(f"보상 회귀 검사: {n}개 상태 중 불일치 배치 {mismatch}개, 단일 {single_mismatch}개")
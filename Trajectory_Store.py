@@ -0,0 +1,288 @@
+import argparse
+import json
+import os
+
+import gymnasium as gym
+import numpy as np
+
+from Game_State import state_dtype
+
+# 스텝 1개: 행동 + 행동 후 상태 (37바이트, 패딩 없음)
+# 상태는 분석용 float32 근삿값이고, 게임 상태를 정확히 되살릴 때는 시작 상태 + 행동으로 다시 진행한다
+STEP_DTYPE = np.dtype([
+    ("action", np.uint8),
+    ("ball_x", np.float32),
+    ("ball_y", np.float32),
+    ("ball_vx", np.float32),
+    ("bar_left_y", np.float32),
+    ("bar_right_y", np.float32),
+    ("wind", np.float32),  # 세기 * 방향 (관측과 같은 값)
+    ("wind_variation", np.float32),
+    ("frame_count", np.int64),
+])
+
+META = "meta.json"
+INDEX = "index.bin"
+
+
+def episode_dtype(num_holes):
+    """인덱스 레코드 1개: 에피소드 위치 + 결과 + 시작 상태 (구멍 배치, 난수 상태 포함)"""
+    return np.dtype([
+        ("chunk", np.int32),
+        ("offset", np.int64),  # 청크 안 시작 줄
+        ("length", np.int32),
+        ("seed", np.int64),  # reset(seed=...) 값 (-1: 시드 없이 이어서 진행)
+        ("level", np.int64),
+        ("success", np.bool_),
+        ("reward", np.float32),
+        ("start", state_dtype(num_holes)),  # EmotionGameCore.snapshot() 레코드
+    ])
+
+
+def _chunk_file(path, chunk):
+    return os.path.join(path, f"chunk-{chunk:05d}.bin")
+
+
+def _memmap(file, dtype):
+    """파일 전체를 dtype 레코드 배열로 매핑 (빈 파일이면 길이 0 배열)"""
+    count = os.path.getsize(file) // dtype.itemsize if os.path.exists(file) else 0
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(file, dtype=dtype, mode="r", shape=(count,))
+
+
+class TrajectoryWriter:
+    """에피소드별 행동/상태를 청크 파일에 이어 쓰는 기록기 (추가 전용)
+
+    스텝은 에피소드가 끝날 때까지 메모리 버퍼에 모았다가 청크 파일에 한 번에 쓰고,
+    그다음에 인덱스 레코드를 쓴다. 그래서 인덱스에 있는 에피소드는 항상 데이터가 온전하고,
+    중간에 죽은 흔적(인덱스에 없는 꼬리)은 다시 열 때 잘라낸다.
+    청크는 chunk_steps 줄을 넘으면 다음 파일로 넘어가며, 에피소드는 청크를 걸치지 않는다.
+    """
+
+    def __init__(self, path, num_holes=8, chunk_steps=1 << 20):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta_file = os.path.join(path, META)
+        if os.path.exists(meta_file):
+            with open(meta_file) as f:
+                meta = json.load(f)
+            num_holes, chunk_steps = meta["num_holes"], meta["chunk_steps"]
+        else:
+            with open(meta_file, "w") as f:
+                json.dump({"num_holes": num_holes, "chunk_steps": chunk_steps}, f)
+        self.num_holes = num_holes
+        self.chunk_steps = chunk_steps
+        self.index_dtype = episode_dtype(num_holes)
+        self._recover()
+
+        self._start = np.zeros((), self.index_dtype)
+        self._steps = np.zeros(1024, STEP_DTYPE)
+        self._length = 0
+        self._open = False
+
+    def _recover(self):
+        """인덱스 기준으로 불완전한 꼬리를 잘라내고 쓰기 위치를 정함"""
+        index_file = os.path.join(self.path, INDEX)
+        self.index = open(index_file, "ab")
+        size = os.path.getsize(index_file)
+        self.episodes = size // self.index_dtype.itemsize
+        self.index.truncate(self.episodes * self.index_dtype.itemsize)
+
+        self.chunk, self.chunk_rows = 0, 0
+        if self.episodes:
+            last = _memmap(index_file, self.index_dtype)[-1]
+            self.chunk, self.chunk_rows = int(last["chunk"]), int(last["offset"] + last["length"])
+            del last
+        chunk = self.chunk + 1
+        while os.path.exists(_chunk_file(self.path, chunk)):
+            os.remove(_chunk_file(self.path, chunk))
+            chunk += 1
+        self.data = open(_chunk_file(self.path, self.chunk), "ab")
+        self.data.truncate(self.chunk_rows * STEP_DTYPE.itemsize)
+
+    def begin(self, game, seed=None):
+        """reset 직후 호출: 시작 상태(구멍 배치/난수 상태 포함)와 시드를 기록"""
+        game.snapshot(self._start["start"])
+        self._start["seed"] = -1 if seed is None else seed
+        self._start["level"] = game.level
+        self._length = 0
+        self._open = True
+
+    def append(self, action, game):
+        """step 직후 호출: 행동과 행동 후 상태 한 줄"""
+        if self._length == len(self._steps):
+            self._steps = np.resize(self._steps, 2 * len(self._steps))
+        self._steps[self._length] = (action, game.ball_x, game.ball_y, game.ball_vx, game.bar_left_y,
+                                     game.bar_right_y, game.wind_strength * game.wind_direction,
+                                     game.wind_variation, game.frame_count)
+        self._length += 1
+
+    def end(self, success, reward=0.0):
+        """에피소드 종료: 스텝을 청크에 쓰고 인덱스 레코드를 추가 (반환: 에피소드 번호)"""
+        if not self._open:
+            return None
+        self._open = False
+        if self.chunk_rows and self.chunk_rows + self._length > self.chunk_steps:
+            self.data.close()
+            self.chunk += 1
+            self.chunk_rows = 0
+            self.data = open(_chunk_file(self.path, self.chunk), "ab")
+
+        self.data.write(self._steps[:self._length].tobytes())
+        self.data.flush()  # 데이터가 인덱스보다 먼저 파일에
+        rec = self._start
+        rec["chunk"] = self.chunk
+        rec["offset"] = self.chunk_rows
+        rec["length"] = self._length
+        rec["success"] = success
+        rec["reward"] = reward
+        self.index.write(rec.tobytes())
+        self.index.flush()
+        self.chunk_rows += self._length
+        self.episodes += 1
+        return self.episodes - 1
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+
+class TrajectoryStore:
+    """TrajectoryWriter 로 쓴 기록을 memmap 으로 읽기 전용으로 열기
+
+    index 는 에피소드 레코드 배열, steps(i) 는 에피소드 i 의 스텝 배열 (청크 memmap 의 view)
+    이라 수백만 스텝도 메모리에 올리지 않고 필요한 페이지만 읽는다.
+    replay() 는 저장된 시작 상태에서 기록된 행동만으로 게임을 다시 진행하고 (정책 추론 없음),
+    scrub() 은 같은 방법으로 원하는 스텝까지 진행한다 (앞으로 가면 이어서, 뒤로 가면 처음부터).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META)) as f:
+            meta = json.load(f)
+        self.num_holes = meta["num_holes"]
+        self.chunk_steps = meta["chunk_steps"]
+        self._chunks = {}
+        self._scrubbing = (None, -1, 0)  # scrub() 이 마지막으로 진행한 (게임, 에피소드, 스텝)
+        self.refresh()
+
+    def refresh(self):
+        """기록기가 이어 쓴 에피소드까지 다시 매핑"""
+        self.index = _memmap(os.path.join(self.path, INDEX), episode_dtype(self.num_holes))
+        self._chunks.clear()
+
+    def __len__(self):
+        return len(self.index)
+
+    def chunk(self, chunk):
+        """청크 파일 하나의 스텝 배열 (memmap)"""
+        if chunk not in self._chunks:
+            self._chunks[chunk] = _memmap(_chunk_file(self.path, chunk), STEP_DTYPE)
+        return self._chunks[chunk]
+
+    def chunks(self):
+        """모든 청크를 차례로 (분석 도구가 청크 단위로 훑을 때)"""
+        for chunk in range(int(self.index["chunk"][-1]) + 1 if len(self.index) else 0):
+            yield self.chunk(chunk)
+
+    def steps(self, episode):
+        rec = self.index[episode]
+        offset = int(rec["offset"])
+        return self.chunk(int(rec["chunk"]))[offset:offset + int(rec["length"])]
+
+    def replay(self, game, episode):
+        """에피소드 시작 상태로 되돌리고 기록된 행동으로 진행하며 스텝마다 game 을 넘김
+
+        같은 설정(use_jit, 레벨 뱅크 등)의 게임이면 기록과 같은 궤적을 그대로 다시 만든다.
+        """
+        game.restore(self.index[episode]["start"])
+        self._scrubbing = (None, -1, 0)
+        yield game
+        for action in self.steps(episode)["action"].tolist():
+            game.apply_action(action)
+            game.update()
+            yield game
+
+    def scrub(self, game, episode, step):
+        """game 을 에피소드의 step 번째 상태로 (0 은 시작 상태)
+
+        replay() 처럼 시작 상태에서 기록된 행동으로 진행하므로 난수/바람 노이즈 위치까지
+        replay() 의 같은 스텝과 똑같고, 거기서 이어서 진행해도 기록과 같은 궤적이 된다.
+        같은 게임/에피소드에서 앞으로 가면 마지막 위치에서 이어서 진행한다.
+        """
+        length = int(self.index[episode]["length"])
+        if not 0 <= step <= length:
+            raise IndexError(f"에피소드 {episode} 는 0 ~ {length} 스텝입니다: {step}")
+        scrub_game, scrub_episode, at = self._scrubbing
+        if scrub_game is not game or scrub_episode != episode or step < at:
+            game.restore(self.index[episode]["start"])
+            at = 0
+        for action in self.steps(episode)["action"][at:step].tolist():
+            game.apply_action(action)
+            game.update()
+        self._scrubbing = (game, episode, step)
+        return game
+
+
+class LogTrajectories(gym.Wrapper):
+    """EmotionBalanceEnv 를 감싸 모든 에피소드를 TrajectoryWriter 로 기록
+
+    reset 시드, 시작 상태, 매 스텝 행동/상태, 끝날 때 성공 여부와 누적 보상을 남긴다.
+    terminated 없이 다음 reset 이 오면 (시간 제한 등) 실패로 닫는다.
+    """
+
+    def __init__(self, env, writer):
+        super().__init__(env)
+        self.writer = writer
+        self._reward = 0.0
+
+    def reset(self, seed=None, options=None):
+        self.writer.end(False, self._reward)
+        obs, info = self.env.reset(seed=seed, options=options)
+        self.writer.begin(self.env.unwrapped.game, seed)
+        self._reward = 0.0
+        return obs, info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self.writer.append(int(action), self.env.unwrapped.game)
+        self._reward += float(reward)
+        if terminated:
+            self.writer.end(bool(info.get("success", False)), self._reward)
+        return obs, reward, terminated, truncated, info
+
+    def close(self):
+        self.writer.end(False, self._reward)
+        self.writer.close()
+        super().close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="궤적 기록 확인/재생")
+    parser.add_argument("path", help="기록 디렉터리")
+    parser.add_argument("--play", type=int, default=None, help="이 번호의 에피소드를 창에서 재생")
+    parser.add_argument("--speed", type=float, default=1.0, help="재생 배속")
+    args = parser.parse_args()
+
+    store = TrajectoryStore(args.path)
+    index = store.index
+    lengths = index["length"]
+    print(f"에피소드 수: {len(store)}, 총 스텝: {int(lengths.sum())}, "
+          f"스텝 레코드 {STEP_DTYPE.itemsize}B, 인덱스 레코드 {index.dtype.itemsize}B")
+    if len(store):
+        print(f"  성공률 {index['success'].mean() * 100:.1f}%, 길이 평균 {lengths.mean():.1f} 최대 {lengths.max()}, "
+              f"평균 보상 {index['reward'].mean():.2f}")
+
+    if args.play is not None:
+        from Balance_Game_Tuned import EmotionGameCore
+
+        game = EmotionGameCore(enabled=True, num_holes=store.num_holes)
+        game.render_options = {"speed": args.speed}
+        for step in range(int(index[args.play]["length"]) + 1):
+            store.scrub(game, args.play, step)
+            game.render()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+import os
+import queue
+import threading
+
+import gymnasium as gym
+import numpy as np
+from PIL import Image, GifImagePlugin
+
+try:
+    import imageio.v2 as imageio
+    IMAGEIO_AVAILABLE = True
+except ImportError:
+    IMAGEIO_AVAILABLE = False
+
+
+class GifWriter:
+    """프레임을 받는 대로 파일에 이어 쓰는 GIF 인코더 (PIL 은 save_all 때 프레임을 전부 모아 둠)
+
+    팔레트는 첫 프레임에서 한 번 만들고 이후 프레임은 같은 팔레트로 양자화한다.
+    게임 화면은 색 수가 적어 첫 프레임 팔레트로 충분하다.
+    """
+
+    def __init__(self, path, fps, loop=0):
+        self.file = open(path, "wb")
+        self.duration = 1000 / fps  # ms (GIF 는 10ms 단위)
+        self.loop = loop
+        self.palette = None
+        self._elapsed = 0.0
+
+    def append(self, frame):
+        image = Image.fromarray(frame)
+        if self.palette is None:
+            self.palette = image.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+            image = self.palette
+            header, _ = GifImagePlugin.getheader(image, info={"loop": self.loop, "duration": self.duration})
+            for chunk in header:
+                self.file.write(chunk)
+        else:
+            image = image.quantize(palette=self.palette, dither=Image.Dither.NONE)
+        # 10ms 단위 반올림 오차가 쌓이지 않도록 누적 시간 기준으로 프레임 길이를 정함
+        start = round(self._elapsed / 10) * 10
+        self._elapsed += self.duration
+        for chunk in GifImagePlugin.getdata(image, duration=round(self._elapsed / 10) * 10 - start):
+            self.file.write(chunk)
+
+    def close(self):
+        try:
+            if self.palette is not None:
+                self.file.write(b";")  # trailer
+        finally:
+            self.file.close()
+
+
+class ImageioWriter:
+    """imageio(ffmpeg) 로 mp4/webm 등 동영상 인코딩 (imageio, imageio-ffmpeg 필요)"""
+
+    def __init__(self, path, fps):
+        # 축소 프레임 크기가 16의 배수가 아니어도 그대로 쓰도록 macro_block_size=1
+        self.writer = imageio.get_writer(path, fps=fps, macro_block_size=1)
+
+    def append(self, frame):
+        self.writer.append_data(frame)
+
+    def close(self):
+        self.writer.close()
+
+
+def open_writer(path, fps):
+    """확장자로 인코더 선택: .gif 는 PIL, 나머지는 imageio"""
+    if path.lower().endswith(".gif"):
+        return GifWriter(path, fps)
+    if not IMAGEIO_AVAILABLE:
+        raise ImportError(f"{os.path.splitext(path)[1]} 녹화에는 imageio[ffmpeg] 가 필요합니다 (.gif 는 PIL 만으로 가능)")
+    return ImageioWriter(path, fps)
+
+
+class EpisodeRule:
+    """녹화 규칙: wants(episode) 로 녹화를 시작할지, keep(episode, success) 로 파일을 남길지 정함"""
+
+    def wants(self, episode):
+        return True
+
+    def keep(self, episode, success):
+        return True
+
+
+class FirstSuccess(EpisodeRule):
+    """처음 성공한 에피소드 하나"""
+
+    def __init__(self):
+        self.found = False
+
+    def wants(self, episode):
+        return not self.found
+
+    def keep(self, episode, success):
+        self.found = self.found or success
+        return success
+
+
+class AllFailures(EpisodeRule):
+    """실패한 에피소드 전부"""
+
+    def keep(self, episode, success):
+        return not success
+
+
+class EveryNth(EpisodeRule):
+    """n 번째 에피소드마다 (0, n, 2n, ...)"""
+
+    def __init__(self, n):
+        self.n = n
+
+    def wants(self, episode):
+        return episode % self.n == 0
+
+
+class VideoRecorder:
+    """선택한 에피소드의 프레임을 백그라운드 스레드에서 인코딩해 파일로 저장
+
+    프레임은 미리 만든 frame_buffers 개 버퍼 중 빈 것에 복사해 큐로 넘기므로
+    에피소드 길이와 상관없이 메모리는 버퍼 개수만큼만 쓴다.
+    빈 버퍼가 없으면 (인코딩이 밀리면) 버퍼가 빌 때까지 기다린다. 실시간 화면 캡처처럼
+    기다릴 수 없는 경우에만 drop_frames=True 로 그 프레임을 버린다 (dropped 로 세고 close 때 알림).
+    성공 여부로 정하는 규칙 때문에 에피소드는 임시 파일에 쓰고, 끝난 뒤 남기거나 지운다.
+    파일 이름: {directory}/{prefix}-{episode:05d}-{success|failure}{ext}
+    """
+
+    def __init__(self, directory, rules=None, fps=60, ext=".gif", prefix="episode", frame_buffers=64,
+                 drop_frames=False):
+        self.directory = directory
+        self.rules = rules if rules is not None else [EpisodeRule()]
+        self.fps = fps
+        self.ext = ext
+        self.prefix = prefix
+        self.frame_buffers = frame_buffers
+        self.drop_frames = drop_frames
+        self.dropped = 0
+        self.saved = []  # 남긴 파일 경로 (인코더 스레드가 실패한 녹화를 빼므로 _lock 으로 보호)
+        self._lock = threading.Lock()
+        self.episode = -1
+        self.recording = False
+        self._active = []  # 이번 에피소드를 원한 규칙
+        self._buffers = None  # 빈 프레임 버퍼 (첫 프레임 크기로 할당)
+        self._jobs = queue.Queue()  # 프레임 수는 버퍼 개수로 제한됨
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        os.makedirs(directory, exist_ok=True)
+        self._thread.start()
+
+    def _run(self):
+        writer = None
+        while True:
+            job = self._jobs.get()
+            try:
+                if job is None:
+                    break
+                kind, value = job
+                if kind == "frame":
+                    try:
+                        if writer is not None:
+                            writer.append(value)
+                    finally:
+                        self._buffers.put(value)
+                elif kind == "open":
+                    writer = open_writer(value, self.fps)
+                else:  # "close": (임시 경로, 최종 경로 또는 None)
+                    tmp, final = value
+                    closing, writer = writer, None
+                    if closing is None:  # 앞에서 실패한 녹화
+                        self._discard(tmp, final)
+                    else:
+                        try:
+                            closing.close()
+                        except Exception:
+                            self._discard(tmp, final)
+                            raise
+                        if final is None:
+                            os.remove(tmp)
+                        else:
+                            os.replace(tmp, final)
+            except Exception as e:  # 녹화 실패로 평가를 멈추지는 않음
+                print(f"⚠️ 녹화 실패: {e}")
+                if writer is not None:  # 파일 핸들은 닫고, 남은 임시 파일은 "close" 때 지움
+                    try:
+                        writer.close()
+                    except Exception:
+                        pass
+                    writer = None
+            finally:
+                self._jobs.task_done()
+
+    def _discard(self, tmp, final):
+        """실패한 녹화: 남기기로 한 경로를 saved 에서 빼고 임시 파일 삭제"""
+        if final is not None:
+            with self._lock:
+                self.saved.remove(final)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    def start_episode(self):
+        """새 에피소드 시작: 규칙 중 하나라도 원하면 녹화 (반환값: 녹화 여부)"""
+        if self.recording:
+            self.end_episode(False)
+        self.episode += 1
+        self._active = [rule for rule in self.rules if rule.wants(self.episode)]
+        self.recording = bool(self._active)
+        if self.recording:
+            self._jobs.put(("open", self._tmp_path()))
+        return self.recording
+
+    def capture(self, frame):
+        """프레임 (높이, 너비, 3) uint8 을 빈 버퍼에 복사해 인코더로 넘김 (frame 은 바로 재사용해도 됨)"""
+        if not self.recording:
+            return
+        if self._buffers is None:
+            self._buffers = queue.Queue()
+            for _ in range(self.frame_buffers):
+                self._buffers.put(np.empty(frame.shape, dtype=np.uint8))
+        if self.drop_frames:
+            try:
+                buffer = self._buffers.get_nowait()
+            except queue.Empty:
+                self.dropped += 1
+                return
+        else:
+            buffer = self._buffers.get()  # 인코더 스레드는 실패해도 버퍼를 돌려주므로 멈추지 않음
+        np.copyto(buffer, frame)
+        self._jobs.put(("frame", buffer))
+
+    def end_episode(self, success):
+        """에피소드 종료: 녹화 중이었다면 규칙에 따라 파일을 남기거나 버림"""
+        if not self.recording:
+            return None
+        self.recording = False
+        # 모든 규칙에 결과를 알려 상태(FirstSuccess 등)를 갱신
+        keep = [rule.keep(self.episode, success) for rule in self._active]
+        final = None
+        if any(keep):
+            name = f"{self.prefix}-{self.episode:05d}-{'success' if success else 'failure'}{self.ext}"
+            final = os.path.join(self.directory, name)
+            with self._lock:
+                self.saved.append(final)
+        self._jobs.put(("close", (self._tmp_path(), final)))
+        return final
+
+    def _tmp_path(self):
+        return os.path.join(self.directory, f".{self.prefix}-{self.episode:05d}.tmp{self.ext}")
+
+    def wait(self):
+        """큐에 남은 프레임 인코딩이 끝날 때까지 대기"""
+        self._jobs.join()
+
+    def close(self):
+        if self.recording:
+            self.end_episode(False)
+        self._jobs.put(None)
+        self._thread.join()
+        if self.dropped:
+            print(f"⚠️ 인코딩이 밀려 버린 프레임: {self.dropped}개")
+
+
+class RecordEpisodes(gym.Wrapper):
+    """EmotionBalanceEnv(render_mode="rgb_array") 를 감싸 에피소드를 VideoRecorder 로 녹화
+
+    녹화하지 않는 에피소드는 그리지도 않는다. frame_skip 스텝마다 한 프레임을 넘기며,
+    동영상 fps 는 recorder.fps 를 따른다 (60 / frame_skip 으로 두면 실제 속도).
+    """
+
+    def __init__(self, env, recorder, frame_skip=1):
+        super().__init__(env)
+        if env.render_mode != "rgb_array":
+            raise ValueError("RecordEpisodes 는 render_mode='rgb_array' 환경이 필요합니다")
+        self.recorder = recorder
+        self.frame_skip = frame_skip
+        self._steps = 0
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+        self._steps = 0
+        if self.recorder.start_episode():
+            self.recorder.capture(self.env.render())
+        return obs, info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self._steps += 1
+        done = terminated or truncated
+        if self.recorder.recording and (done or self._steps % self.frame_skip == 0):
+            self.recorder.capture(self.env.render())
+        if done:
+            self.recorder.end_episode(bool(info.get("success", False)))
+        return obs, reward, terminated, truncated, info
+
+    def close(self):
+        self.recorder.close()
+        super().close()